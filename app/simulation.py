@@ -87,7 +87,8 @@ class SimulationEngine:
             success = bot.assign_order(order)
             
             if success:
-                logger.info(f"注文 #{order.order_id} を Robot#{bot.robot_id} に割り当てました, テーブル番号: {table_id}")
+                logger.info("注文 #%s を Robot#%s に割り当てました, テーブル番号: %s",
+                            order.order_id, bot.robot_id, table_id)
                 self.assigned_orders.append(order)
                 assigned_tables.add(table_id)
                 orders_created += 1
@@ -274,9 +274,10 @@ def load_layout_to_editor(restaurant):
     if restaurant and restaurant.layout:
         set_editor_height(restaurant.layout.height)
         set_editor_width(restaurant.layout.width)
-        set_editor_grid(restaurant.layout.grid)
-        set_editor_tables(restaurant.layout.tables)
-        set_editor_kitchen(restaurant.layout.kitchen)
+        # レイアウト本体のキャッシュと食い違わないよう、コピーを編集する
+        set_editor_grid([row[:] for row in restaurant.layout.grid])
+        set_editor_tables(dict(restaurant.layout.tables))
+        set_editor_kitchen(list(restaurant.layout.kitchen))
         set_editor_parking(restaurant.layout.parking)
         set_editor_layout_name(restaurant.name)
         set_editor_loaded(True)
@@ -49,10 +49,10 @@ def render_layout_editor():
             # 高さを変更するときに既存のデータを保持
             current_grid = get_editor_grid()
             current_width = get_editor_width()
-            new_grid = [[0 for _ in range(current_width)] for _ in range(new_height)]
-            for i in range(min(new_height, current_height)):
-                for j in range(current_width):
-                    new_grid[i][j] = current_grid[i][j]
+            # 残す行はスライスでまとめてコピーし、追加行だけ0で埋める
+            keep = min(new_height, current_height)
+            new_grid = [row[:current_width] for row in current_grid[:keep]]
+            new_grid += [[0] * current_width for _ in range(new_height - keep)]
             set_editor_grid(new_grid)
             set_editor_height(new_height)
             
@@ -80,10 +80,9 @@ def render_layout_editor():
             # 幅を変更するときに既存のデータを保持
             current_grid = get_editor_grid()
             current_height = get_editor_height()
-            new_grid = [[0 for _ in range(new_width)] for _ in range(current_height)]
-            for i in range(current_height):
-                for j in range(min(new_width, current_width)):
-                    new_grid[i][j] = current_grid[i][j]
+            # 各行を残す列までスライスし、不足分を0で埋める
+            keep = min(new_width, current_width)
+            new_grid = [row[:keep] + [0] * (new_width - keep) for row in current_grid[:current_height]]
             set_editor_grid(new_grid)
             set_editor_width(new_width)
 
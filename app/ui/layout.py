@@ -43,23 +43,28 @@ def render_restaurant_layout(
     """
     path = path or []
     table_positions = table_positions or {}
+    grid = restaurant.layout.grid
+
+    # セルごとの線形探索を避けるため、パスとテーブル位置を集合・辞書に変換
+    path_cells = set(path)
+    table_labels = {}
+    for name, tpos in table_positions.items():
+        table_labels.setdefault(tuple(tpos), name)
 
     st.markdown(f"### {title}")
     st.markdown("⬇️ 現在のレストラングリッドレイアウト：")
 
-    html = f"""
-    <div style="display: grid; grid-template-columns: repeat({len(restaurant.layout.grid[0])}, 24px); gap: 1px;">
-    """
+    parts = [f"""
+    <div style="display: grid; grid-template-columns: repeat({len(grid[0])}, 24px); gap: 1px;">
+    """]
 
-    for row in range(len(restaurant.layout.grid)):
-        for col in range(len(restaurant.layout.grid[0])):
+    # 行リストを一度取り出して列を順に走査（セルごとの二重添字参照を省く）
+    for row, cells in enumerate(grid):
+        for col, val in enumerate(cells):
             pos = (row, col)
             color = "#ffffff"  # デフォルトの空地は白色
-            label = ""
 
-            val = restaurant.layout.grid[row][col]
-
-            if pos in path:
+            if pos in path_cells:
                 color = "#ff4d4d"  # パスは赤色
             elif val == 1:
                 color = "#333333"  # 壁
@@ -67,16 +72,13 @@ def render_restaurant_layout(
                 color = "#f5c518"  # キッチン
             elif val == 4:
                 color = "#4da6ff"  # 駐車場
-            elif val == 2 or pos in table_positions.values():
+            elif val == 2 or pos in table_labels:
                 color = "#00cc66"  # テーブルは緑色
 
             # テーブルの場合、テキストを表示
-            for name, tpos in table_positions.items():
-                if tpos == pos:
-                    label = name
-                    break
+            label = table_labels.get(pos, "")
 
-            html += f"""
+            parts.append(f"""
             <div style="
                 width: 24px;
                 height: 24px;
@@ -89,9 +91,10 @@ def render_restaurant_layout(
                 font-weight: bold;
                 border: 1px solid #aaa;
             ">{label}</div>
-            """
+            """)
 
-    html += "</div>"
+    parts.append("</div>")
+    html = "".join(parts)
 
     st.markdown(html, unsafe_allow_html=True)
 
@@ -108,7 +111,6 @@ def render_plotly_restaurant_layout(_restaurant, path=None, title="レストラ
     - random_key: str，オプション、強制的に再レンダリングするためのランダムキー
     """
     layout = _restaurant.layout
-    grid = layout.grid
     height = layout.height
     width = layout.width
 
@@ -121,28 +123,11 @@ def render_plotly_restaurant_layout(_restaurant, path=None, title="レストラ
         4: "#4da6ff",  # 駐車場
     }
 
-    # ラベルマップを作成
-    labels = [["" for _ in range(width)] for _ in range(height)]
-
-    # テーブルラベルを設定
-    for table_id, pos in layout.tables.items():
-        row, col = pos
-        labels[row][col] = table_id
-
-    # キッチンラベルを設定
-    for row, col in layout.kitchen:
-        labels[row][col] = "厨"
-
-    # 駐車場ラベルを設定
-    if layout.parking:
-        row, col = layout.parking
-        labels[row][col] = "停"
-
     # ヒートマップデータを作成
     fig = go.Figure()
 
     # ヒートマップ - 色塊を表示
-    heatmap_z = np.array(grid)
+    heatmap_z = layout.grid_array
     colorscale = [
         [0, colormap[0]],
         [0.2, colormap[0]],
@@ -165,17 +150,8 @@ def render_plotly_restaurant_layout(_restaurant, path=None, title="レストラ
         )
     )
 
-    # テキスト注釈 - ラベルを表示
-    for i in range(height):
-        for j in range(width):
-            if labels[i][j]:
-                fig.add_annotation(
-                    x=j,
-                    y=i,
-                    text=labels[i][j],
-                    showarrow=False,
-                    font=dict(size=14, color="black", family="Arial Black"),
-                )
+    # テキスト注釈 - ラベルを表示（全セルを走査せず、ラベルのあるセルだけをまとめて設定）
+    fig.update_layout(annotations=_cell_label_annotations(layout))
 
     # パスポイント（存在する場合）
     if path:
@@ -257,6 +233,29 @@ def _get_table_style(x, y, tables):
         return Text("卓", style="black on cyan")
 
 
+def _cell_label_annotations(layout):
+    """
+    テーブル・キッチン・駐車場のラベル注釈を行優先順のリストで返す
+    """
+    # 後から設定したラベルが優先（テーブル → キッチン → 駐車場）
+    labels = {tuple(pos): table_id for table_id, pos in layout.tables.items()}
+    for pos in layout.kitchen:
+        labels[tuple(pos)] = "厨"
+    if layout.parking:
+        labels[tuple(layout.parking)] = "停"
+
+    return [
+        dict(
+            x=col,
+            y=row,
+            text=text,
+            showarrow=False,
+            font=dict(size=14, color="black", family="Arial Black"),
+        )
+        for (row, col), text in sorted(labels.items())
+    ]
+
+
 @st.cache_data(ttl=300, show_spinner=False, hash_funcs={object: lambda x: id(x)}) if ENABLE_CACHING else lambda f: f
 def render_plotly_robot_path(_restaurant, path_history, orders=None, title="ロボット経路"):
     """
@@ -269,7 +268,6 @@ def render_plotly_robot_path(_restaurant, path_history, orders=None, title="ロ
         title: チャートタイトル
     """
     layout = _restaurant.layout
-    grid = layout.grid
     height = layout.height
     width = layout.width
 
@@ -282,28 +280,11 @@ def render_plotly_robot_path(_restaurant, path_history, orders=None, title="ロ
         4: "#4da6ff",  # 駐車場
     }
 
-    # ラベルマップを作成
-    labels = [["" for _ in range(width)] for _ in range(height)]
-
-    # テーブルラベルを設定
-    for table_id, pos in layout.tables.items():
-        row, col = pos
-        labels[row][col] = table_id
-
-    # キッチンラベルを設定
-    for row, col in layout.kitchen:
-        labels[row][col] = "厨"
-
-    # 駐車場ラベルを設定
-    if layout.parking:
-        row, col = layout.parking
-        labels[row][col] = "停"
-
     # ヒートマップデータを作成
     fig = go.Figure()
 
     # ヒートマップ - 色塊を表示
-    heatmap_z = np.array(grid)
+    heatmap_z = layout.grid_array
     colorscale = [
         [0, colormap[0]],
         [0.2, colormap[0]],
@@ -326,24 +307,15 @@ def render_plotly_robot_path(_restaurant, path_history, orders=None, title="ロ
         )
     )
 
-    # テキスト注釈 - ラベルを表示
-    for i in range(height):
-        for j in range(width):
-            if labels[i][j]:
-                fig.add_annotation(
-                    x=j,
-                    y=i,
-                    text=labels[i][j],
-                    showarrow=False,
-                    font=dict(size=14, color="black", family="Arial Black"),
-                )
+    # テキスト注釈 - ラベルを表示（全セルを走査せず、ラベルのあるセルだけをまとめて設定）
+    fig.update_layout(annotations=_cell_label_annotations(layout))
 
     # パスポイントを抽出
-    if path_history:
-        # パスポイントを解包
-        path_points = path_history
-        if path_points:
-            path_y, path_x = zip(*path_points)
+    if path_history is not None and len(path_history):
+        # パスポイントを解包（(N, 2) 配列の列をそのまま座標列として使う）
+        path_points = np.asarray(path_history)
+        if len(path_points):
+            path_y, path_x = path_points[:, 0], path_points[:, 1]
 
             # マーカー付きのパスラインを追加
             fig.add_trace(
@@ -480,7 +452,6 @@ def render_plotly_restaurant_layout_no_cache(_restaurant, path=None, title="レ
     - title: str，タイトル
     """
     layout = _restaurant.layout
-    grid = layout.grid
     height = layout.height
     width = layout.width
 
@@ -493,28 +464,11 @@ def render_plotly_restaurant_layout_no_cache(_restaurant, path=None, title="レ
         4: "#4da6ff",  # 駐車場
     }
 
-    # ラベルマップを作成
-    labels = [["" for _ in range(width)] for _ in range(height)]
-
-    # テーブルラベルを設定
-    for table_id, pos in layout.tables.items():
-        row, col = pos
-        labels[row][col] = table_id
-
-    # キッチンラベルを設定
-    for row, col in layout.kitchen:
-        labels[row][col] = "厨"
-
-    # 駐車場ラベルを設定
-    if layout.parking:
-        row, col = layout.parking
-        labels[row][col] = "停"
-
     # チャートを作成
     fig = go.Figure()
 
     # チャートデータ
-    heatmap_z = np.array(grid)
+    heatmap_z = layout.grid_array
     colorscale = [
         [0, colormap[0]],
         [0.2, colormap[0]],
@@ -537,17 +491,8 @@ def render_plotly_restaurant_layout_no_cache(_restaurant, path=None, title="レ
         )
     )
 
-    # テキスト注釈 - ラベルを表示
-    for i in range(height):
-        for j in range(width):
-            if labels[i][j]:
-                fig.add_annotation(
-                    x=j,
-                    y=i,
-                    text=labels[i][j],
-                    showarrow=False,
-                    font=dict(size=14, color="black", family="Arial Black"),
-                )
+    # テキスト注釈 - ラベルを表示（全セルを走査せず、ラベルのあるセルだけをまとめて設定）
+    fig.update_layout(annotations=_cell_label_annotations(layout))
 
     # パスポイント（存在する場合）
     if path:
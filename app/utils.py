@@ -2,9 +2,13 @@
 ユーティリティ関数
 """
 import os
+import sys
 import json
+import functools
 from typing import Tuple, Optional, List, Dict, Any
 
+import numpy as np
+
 from rich.panel import Panel
 from rich.text import Text
 from rich.box import ROUNDED
@@ -15,29 +19,86 @@ from restaurant.restaurant import Restaurant
 from robot import AIEnhancedRobot, Robot
 from robot.order import Order
 
-from .constants import LAYOUT_DIR, RAG_KB_DIR, EMPTY_STYLE, WALL_STYLE, TABLE_STYLE, KITCHEN_STYLE, PARKING_STYLE, ERROR_STYLE
+from .constants import logger, LAYOUT_DIR, RAG_KB_DIR, EMPTY_STYLE, WALL_STYLE, TABLE_STYLE, KITCHEN_STYLE, PARKING_STYLE, ERROR_STYLE
+
+
+# レイアウト文字列の記号 → セル値の対応表（未知の記号は -1）
+_LAYOUT_CHAR_CODES = {
+    "#": 1, "＃": 1, "W": 1,    # 壁/障害物
+    "*": 0, ".": 0,             # 空き地
+    "台": 3,                    # キッチン
+    "停": 4, "P": 4             # 駐車位置
+}
 
 
 def available_layouts(layout_dir=LAYOUT_DIR):
     """
     利用可能なレストランレイアウトのリストを取得する
     """
-    # 新しい形式のレイアウトファイルが存在するかチェック
+    # 新しい形式のレイアウトファイルが存在するかチェック（更新時刻とサイズが変わるまで結果を再利用）
     new_format_path = os.path.join(layout_dir, "layouts.json")
     if os.path.exists(new_format_path):
-        try:
-            with open(new_format_path, encoding="utf-8") as f:
-                layouts_data = json.load(f)
-                return [layout["name"] for layout in layouts_data["layouts"]]
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"新しい形式のレイアウトファイルの読み込みに失敗しました: {e}")
-            return []
+        return list(_layout_names(new_format_path, _file_stamp(new_format_path)))
     
-    # 古い形式のレイアウトファイルにフォールバック
+    # 古い形式のレイアウトファイルにフォールバック（ディレクトリの更新時刻でキャッシュ）
     if os.path.exists(layout_dir):
-        return sorted(os.path.splitext(f)[0] for f in os.listdir(layout_dir) if f.endswith(".json") and f != "layouts.json")
+        return list(_legacy_layout_names(layout_dir, _file_stamp(layout_dir)))
     return []
 
+def _file_stamp(path):
+    """
+    キャッシュキー用のファイル識別値（更新時刻, サイズ）
+    更新時刻の分解能が粗いファイルシステムでも、サイズが変われば別のキーになる
+    """
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+def _clear_layout_caches():
+    """
+    レイアウトファイルを書き換えた後に読み込みキャッシュを破棄する
+    （同じ時刻・同じサイズでの上書きでも古い内容を返さないように）
+    """
+    _layout_names.cache_clear()
+    _legacy_layout_names.cache_clear()
+    _load_layout_template.cache_clear()
+
+@functools.lru_cache(maxsize=8)
+def _layout_names(path, stamp):
+    """
+    layouts.jsonに含まれるレイアウト名を返す（ファイル更新時刻・サイズごとにキャッシュ）
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            layouts_data = json.load(f)
+            return tuple(layout["name"] for layout in layouts_data["layouts"])
+    except (json.JSONDecodeError, KeyError) as e:
+        logger.warning("新しい形式のレイアウトファイルの読み込みに失敗しました: %s", e)
+        return ()
+
+@functools.lru_cache(maxsize=8)
+def _legacy_layout_names(layout_dir, stamp):
+    """
+    古い形式の個別レイアウトファイル名を返す（ディレクトリ更新時刻ごとにキャッシュ）
+    """
+    # scandir のエントリは種別情報を持つため追加の stat が不要。拡張子は確認済みなので切り落とすだけ
+    with os.scandir(layout_dir) as entries:
+        return tuple(sorted(
+            entry.name[:-5] for entry in entries
+            if entry.name.endswith(".json") and entry.name != "layouts.json" and entry.is_file()
+        ))
+
+def _token_code(token):
+    """
+    レイアウト文字列のトークンをセル値に変換（テーブルは -2、未知の記号は -1）
+    """
+    code = _LAYOUT_CHAR_CODES.get(token)
+    if code is not None:
+        return code
+    # 既知の記号以外の1文字の英字はテーブル
+    if len(token) == 1 and token.isalpha():
+        return -2
+    return -1
+
 def parse_layout_from_strings(layout_name: str, layout_lines: List[str]):
     """
     文字列配列からレストランレイアウトを解析する
@@ -49,46 +110,43 @@ def parse_layout_from_strings(layout_name: str, layout_lines: List[str]):
     Returns:
         dict: 解析されたレイアウト設定を含む
     """
-    # 文字から数値へのマッピング
-    char_map = {
-        "#": 1, "＃": 1, "W": 1,    # 壁/障害物
-        "*": 0, ".": 0,             # 空き地
-        "台": 3,                    # キッチン
-        "停": 4, "P": 4             # 駐車位置
-    }
-    
     # データ構造の初期化
     height = len(layout_lines)
-    width = max(len(line.split()) for line in layout_lines) if height else 0
-    grid = [[0] * width for _ in range(height)]
-    table_positions = {}
-    kitchen_positions = []
-    parking_position = None
-    
-    # レイアウト文字列の解析
-    for row, line in enumerate(layout_lines):
-        tokens = line.split()
-        for col, token in enumerate(tokens):
-            if token in char_map:
-                # 既知の記号
-                value = char_map[token]
-                grid[row][col] = value
-                
-                # 特殊位置の記録
-                if value == 3:  # キッチン
-                    kitchen_positions.append((row, col))
-                elif value == 4:  # 駐車位置
-                    parking_position = (row, col)
-            elif token.isalpha() and len(token) == 1:
-                # テーブル
-                grid[row][col] = 2
-                table_positions[token] = (row, col)
-            else:
-                # 未知の記号、空き地として処理
-                grid[row][col] = 0
+    if not height:
+        return {
+            "grid": [],
+            "table_positions": {},
+            "kitchen_positions": [],
+            "parking_position": None
+        }
+    token_rows = [line.split() for line in layout_lines]
+    width = max(len(tokens) for tokens in token_rows)
+    
+    # トークンを2次元に揃える（不足分は空文字で埋める）
+    padded_rows = [row + [""] * (width - len(row)) for row in token_rows]
+    
+    # 対応表を1回引くだけでセル値に変換（記号ごとに配列全体を比較しない）
+    # テーブルは -2、未知の記号は -1 として同じパスで判定する
+    codes = np.array(
+        [[_token_code(token) for token in row] for row in padded_rows],
+        dtype=np.int64,
+    ).reshape(height, width)
+    table_mask = codes == -2
+    grid = np.where(codes >= 0, codes, 0)
+    grid[table_mask] = 2
+    
+    # 特殊位置の記録（行優先順）
+    rows, cols = np.nonzero(table_mask)
+    table_positions = {
+        padded_rows[row][col]: (row, col)
+        for row, col in zip(rows.tolist(), cols.tolist())
+    }
+    kitchen_positions = [tuple(pos) for pos in np.argwhere(grid == 3).tolist()]
+    parking_hits = np.argwhere(grid == 4).tolist()
+    parking_position = tuple(parking_hits[-1]) if parking_hits else None
     
     return {
-        "grid": grid,
+        "grid": grid.tolist(),
         "table_positions": table_positions,
         "kitchen_positions": kitchen_positions,
         "parking_position": parking_position
@@ -105,41 +163,12 @@ def display_restaurant_ascii(restaurant, restaurant_name=None):
     layout = getattr(restaurant, 'layout', restaurant)
     name = restaurant_name or getattr(restaurant, 'name', 'Restaurant')
     
-    # 記号マッピング（数字コードに基づく）
-    symbols = {
-        0: ".",    # 空き地
-        1: "#",    # 壁/障害物
-        2: "?",    # テーブル（テーブル番号に置き換えられる）
-        3: "?",    # キッチン
-        4: "P",    # 駐車位置
-        100: "K",  # キッチン（新形式）
-        200: "P",  # 駐車位置（新形式）
-    }
-    
-    # タイトルの表示
-    print(f"レストランレイアウト: {name} ({layout.width}x{layout.height})")
-    print("-" * (layout.width * 2 + 3))
-    
-    # テーブルIDの逆引き
-    rev_tables = {pos: tid for tid, pos in layout.tables.items()}
-    
-    # レイアウトの表示
-    for i in range(layout.height):
-        print("|", end=" ")
-        for j in range(layout.width):
-            cell_value = layout.grid[i][j]
-            if cell_value == 2 and (i, j) in rev_tables:
-                # テーブルIDを表示
-                print(rev_tables[(i, j)], end=" ")
-            elif 2 <= cell_value <= 99:
-                # 数字で表されるテーブルID（rev_tablesから取得、なければ?を表示）
-                print(rev_tables.get((i, j), "?"), end=" ")
-            else:
-                # その他のタイプのセル
-                print(symbols.get(cell_value, "?"), end=" ")
-        print("|")
-    
-    print("-" * (layout.width * 2 + 3))
+    # タイトル・区切り線・レイアウト本体をまとめて組み立て、一度の書き込みで出力
+    separator = "-" * (layout.width * 2 + 3)
+    sys.stdout.write(
+        f"レストランレイアウト: {name} ({layout.width}x{layout.height})\n"
+        f"{separator}\n{layout.render()}\n{separator}\n"
+    )
 
 def load_restaurant(layout_name, layout_dir=LAYOUT_DIR):
     """
@@ -149,14 +178,32 @@ def load_restaurant(layout_name, layout_dir=LAYOUT_DIR):
     if not os.path.exists(new_format_path):
         raise FileNotFoundError(f"レイアウトファイルが見つかりません: {new_format_path}")
 
-    with open(new_format_path, encoding="utf-8") as f:
+    # 解析結果は更新時刻とサイズをキーにキャッシュし、毎回新しいコピーからレストランを生成
+    cfg = _load_layout_template(new_format_path, _file_stamp(new_format_path), layout_name)
+    return Restaurant(
+        layout_name,
+        RestaurantLayout(
+            grid=[row[:] for row in cfg["grid"]],
+            table_positions=dict(cfg["table_positions"]),
+            kitchen_positions=list(cfg["kitchen_positions"]),
+            parking_position=cfg["parking_position"],
+        ),
+    )
+
+@functools.lru_cache(maxsize=32)
+def _load_layout_template(path, stamp, layout_name):
+    """
+    layouts.jsonから指定レイアウトを解析した設定を返す（ファイル更新時刻・サイズごとにキャッシュ）
+    
+    戻り値は共有されるため、呼び出し側で変更しないこと
+    """
+    with open(path, encoding="utf-8") as f:
         layouts_data = json.load(f)
     for layout in layouts_data["layouts"]:
         if layout["name"] == layout_name:
-            cfg = RestaurantLayout.parse_layout_from_array(
+            return RestaurantLayout.parse_layout_from_array(
                 layout_name, layout["grid"]
             )
-            return Restaurant(layout_name, RestaurantLayout(**cfg))
 
     raise KeyError(f"layouts.jsonに名前が{layout_name}のレイアウトが見つかりません")
 
@@ -214,6 +261,7 @@ def save_restaurant_layout(layout_data, layout_dir=LAYOUT_DIR):
     # layouts.jsonに保存
     with open(layouts_path, "w", encoding="utf-8") as f:
         json.dump({"layouts": layouts}, f, ensure_ascii=False, indent=2)
+    _clear_layout_caches()
     
     return layouts_path
 
@@ -240,6 +288,7 @@ def save_layouts_to_single_file(layouts: List[Dict[str, Any]], layout_dir=LAYOUT
     file_path = os.path.join(layout_dir, "layouts.json")
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(save_data, f, ensure_ascii=False, indent=2)
+    _clear_layout_caches()
     
     return file_path
 
@@ -270,16 +319,18 @@ def delete_restaurant_layout(layout_name, layout_dir=LAYOUT_DIR):
             # ファイルに書き戻す
             with open(new_format_path, "w", encoding="utf-8") as f:
                 json.dump(layouts_data, f, ensure_ascii=False, indent=2)
+            _clear_layout_caches()
             
             return True
         except Exception as e:
-            print(f"新形式ファイルからレイアウトの削除に失敗しました: {e}")
+            logger.error("新形式ファイルからレイアウトの削除に失敗しました: %s", e)
             return False
     
     # 古い形式にフォールバック
     file_path = os.path.join(layout_dir, f"{layout_name}.json")
     if os.path.exists(file_path):
         os.remove(file_path)
+        _clear_layout_caches()
         return True
     return False
 
@@ -337,6 +388,9 @@ def create_rich_layout(grid, height, width, tables,
         4: PARKING_STYLE,
     }
     
+    # 位置 → テーブルIDの逆引き（セルごとの線形探索を避ける）
+    pos_to_table = {tuple(tpos): tid for tid, tpos in tables.items()}
+    
     layout_text = Text()
     
     for x in range(height):
@@ -350,7 +404,8 @@ def create_rich_layout(grid, height, width, tables,
             
             # セルテキストを取得
             if cell_type == 2:  # テーブルの特別処理
-                cell_text = get_table_id(pos, tables)
+                tid = pos_to_table.get(pos)
+                cell_text = tid.center(2) if tid is not None else "テ"
             else:
                 cell_text = cell_chars.get(cell_type, "??")
             
@@ -375,16 +430,6 @@ def create_rich_layout(grid, height, width, tables,
         
     return layout_text
 
-def get_table_id(pos, tables):
-    """
-    特定の位置に対応するテーブルIDを取得する
-    """
-    # 位置からテーブルIDを逆引き
-    for tid, tpos in tables.items():
-        if tpos == pos:
-            return tid.center(2)
-    return "テ"
-
 def create_rich_restaurant_panel(restaurant, 
                                 robot_position=None, 
                                 highlight_path=None,
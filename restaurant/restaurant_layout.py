@@ -14,14 +14,48 @@ RestaurantLayout – レストラン平面図データ構造。
 
 from __future__ import annotations
 
+import sys
+from collections import OrderedDict, deque
 from typing import List, Tuple, Dict, Optional
 
+import numpy as np
+
+# 通行可能なセル値（空地 / 駐車ポイント / 生データのキッチン・駐車ポイント）
+WALKABLE_CODES: Tuple[int, ...] = (0, 4, 100, 200)
+# セル値（uint8）→ 通行可否の参照表。マスクは1回の参照で求まる
+_WALKABLE_LUT = np.zeros(256, dtype=bool)
+_WALKABLE_LUT[list(WALKABLE_CODES)] = True
+
+# 隣接セルの相対位置（上、下、左、右の順。経路探索の展開順もこれに従う）
+_NEIGHBOR_OFFSETS: Tuple[Tuple[int, int], ...] = ((-1, 0), (1, 0), (0, -1), (0, 1))
+# 配膳ポイント探索の方向（上、右、下、左の順）
+_DELIVERY_DIRECTIONS: Tuple[Tuple[int, int], ...] = ((-1, 0), (0, 1), (1, 0), (0, -1))
+
+# ASCII表示用の記号テーブル（セル値 → 記号）。テーブル（2～99）はIDに置き換えられる
+_DISPLAY_SYMBOLS = np.full(256, "?", dtype=object)
+_DISPLAY_SYMBOLS[0] = "."    # 空地
+_DISPLAY_SYMBOLS[1] = "#"    # 壁/障害物
+_DISPLAY_SYMBOLS[4] = "P"    # 駐車ポイント
+_DISPLAY_SYMBOLS[100] = "K"  # キッチン（生データ）
+_DISPLAY_SYMBOLS[200] = "P"  # 駐車ポイント（生データ）
+
 
 class RestaurantLayout:
     """
     二次元グリッドのレストランレイアウト
     """
 
+    # 解析後のセル値
+    EMPTY = 0
+    WALL = 1
+    TABLE = 2
+    KITCHEN = 3
+    PARKING = 4
+
+    # ヒューリスティックマップをキャッシュする目標地点数
+    # （全テーブルの配膳ポイント・キッチン・駐車ポイントが収まる大きさにする）
+    HEURISTIC_CACHE_SIZE = 64
+
     # ----- 構築 -------------------------------------------------------------- #
     def __init__(
         self,
@@ -36,13 +70,25 @@ class RestaurantLayout:
             self.width: int = 10
             self.grid: List[List[int]] = [[0] * self.width for _ in range(self.height)]
         else:
-            self.grid = grid
+            # 呼び出し側（エディタの編集中グリッドなど）と行を共有しないよう複製する
+            # 共有すると外部での書き換えが refresh() なしで反映され、派生キャッシュと食い違う
+            self.grid = [list(row) for row in grid]
             self.height = len(grid)
             self.width = len(grid[0]) if self.height else 0
 
+        # NumPy配列と通行可能マスクを構築（refresh() のたびに version が進む）
+        self.version: int = 0
+        self.refresh()
+
         self.tables: Dict[str, Tuple[int, int]] = table_positions or {}
         self.kitchen: List[Tuple[int, int]] = kitchen_positions or []
         self.parking: Optional[Tuple[int, int]] = parking_position
+        if self.parking is None:
+            # 未指定の場合はグリッド上の駐車ポイントを一括検索
+            # 複数ある場合はレイアウト解析関数と同じく行優先で最後のものを採用
+            hits = np.argwhere(self._grid_np == self.PARKING)
+            if len(hits):
+                self.parking = (int(hits[-1][0]), int(hits[-1][1]))
         
         # 各テーブルの配膳ポイント、フォーマット: {テーブルID: (行, 列)}
         self.delivery_points: Dict[str, Tuple[int, int]] = delivery_points or {}
@@ -51,22 +97,94 @@ class RestaurantLayout:
         if not self.delivery_points:
             self._generate_delivery_points()
 
+    def refresh(self) -> None:
+        """
+        `grid` からNumPy配列・1次元の通行可能マスク・隣接リストを再構築
+        `grid` や `tables` を直接書き換えた場合は必ず呼び出すこと
+        """
+        # 経路キャッシュなど、レイアウトから派生した外部キャッシュの無効化に使う
+        self.version += 1
+        self._grid_np: np.ndarray = np.array(self.grid, dtype=np.uint8).reshape(
+            self.height, self.width
+        )
+        self._walkable: np.ndarray = _WALKABLE_LUT[self._grid_np]
+        # 派生キャッシュは `grid` のスナップショットなので読み取り専用に固定する
+        self._grid_np.flags.writeable = False
+        self._walkable.flags.writeable = False
+        # 行優先の1次元バイト列（1セル1バイト）。単一セルは x * width + y で参照
+        self._walkable_flat: bytes = self._walkable.astype(np.uint8).tobytes()
+        # 各セルの通行可能な隣接セルを一度だけ計算（レイアウトは静的なため）
+        # 呼び出し側で共有されるため、変更できないタプルで保持する
+        h, w = self.height, self.width
+        self._adj: Tuple[Tuple[Tuple[int, int], ...], ...] = tuple(
+            self._compute_neighbors(x, y) for x in range(h) for y in range(w)
+        )
+        # 同じ隣接リストをセル番号（x * width + y）で表したもの
+        self._adj_ids: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(nx * w + ny for nx, ny in nbs) for nbs in self._adj
+        )
+        self._heuristic_cache: "OrderedDict[Tuple[int, int], List[int]]" = OrderedDict()
+        # 連結成分ラベル（初回の到達判定時に一度だけ計算）
+        self._component_labels: Optional[List[int]] = None
+        # 位置 → テーブルIDの逆引きインデックス（初回参照時に構築、描画時の線形探索を避ける）
+        self._pos_to_table: Optional[Dict[Tuple[int, int], str]] = None
+        # テーブルごとの通行可能な隣接セル（初回参照時に一度だけ計算）
+        self._table_adjacent: Optional[Dict[str, Tuple[Tuple[int, int], ...]]] = None
+
+    @property
+    def grid_array(self) -> np.ndarray:
+        """
+        グリッドのuint8 NumPy配列（形状: (height, width)、読み取り専用）
+        セルを変更する場合は `grid` を書き換えて `refresh()` を呼ぶこと
+        """
+        return self._grid_np
+
+    @property
+    def neighbor_ids(self) -> Tuple[Tuple[int, ...], ...]:
+        """
+        セル番号（x * width + y）ごとの通行可能な隣接セル番号
+        """
+        return self._adj_ids
+
+    @property
+    def pos_to_table(self) -> Dict[Tuple[int, int], str]:
+        """
+        位置からテーブルIDへの逆引き辞書
+        """
+        if self._pos_to_table is None:
+            self._pos_to_table = {tuple(pos): tid for tid, pos in self.tables.items()}
+        return self._pos_to_table
+
+    @property
+    def table_adjacent(self) -> Dict[str, Tuple[Tuple[int, int], ...]]:
+        """
+        テーブルIDごとの通行可能な隣接セル（上、右、下、左の順）
+        """
+        if self._table_adjacent is None:
+            self._table_adjacent = {
+                tid: tuple(
+                    (row + dr, col + dc)
+                    for dr, dc in _DELIVERY_DIRECTIONS
+                    if self.is_free((row + dr, col + dc))
+                )
+                for tid, (row, col) in self.tables.items()
+            }
+        return self._table_adjacent
+
     def _generate_delivery_points(self) -> None:
         """
         各テーブルの配膳ポイントを自動生成
         北、東、南、西の四方向で最も近い空きポイントを優先
         """
-        directions = [(-1, 0), (0, 1), (1, 0), (0, -1)]  # 上、右、下、左
+        directions = _DELIVERY_DIRECTIONS  # 上、右、下、左
+        adjacent = self.table_adjacent
         
         for table_id, table_pos in self.tables.items():
             row, col = table_pos
             
-            # 四方向を試す
-            for dr, dc in directions:
-                delivery_pos = (row + dr, col + dc)
-                if self.is_free(delivery_pos):
-                    self.delivery_points[table_id] = delivery_pos
-                    break
+            # 四方向の隣接セル（事前計算済み、方向順）の先頭を採用
+            if adjacent[table_id]:
+                self.delivery_points[table_id] = adjacent[table_id][0]
             
             # 四つの隣接ポイントが使用できない場合、より遠いポイントを試す
             if table_id not in self.delivery_points:
@@ -84,17 +202,120 @@ class RestaurantLayout:
         位置が通行可能かどうか（空地 / キッチン / 駐車ポイント）
         """
         x, y = pos
-        return (
-            0 <= x < self.height and 0 <= y < self.width and self.grid[x][y] in (0, 4, 100, 200)
-        )
+        w = self.width
+        return 0 <= x < self.height and 0 <= y < w and self._walkable_flat[x * w + y] == 1
 
-    def neighbors(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+    def neighbors(self, pos: Tuple[int, int]) -> Tuple[Tuple[int, int], ...]:
         """
-        上下左右の通行可能な隣接位置を返す
+        上下左右の通行可能な隣接位置を返す（セルごとの事前計算済みキャッシュ）
         """
         x, y = pos
-        cand = [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]
-        return [p for p in cand if self.is_free(p)]
+        w = self.width
+        if 0 <= x < self.height and 0 <= y < w:
+            return self._adj[x * w + y]
+        return self._compute_neighbors(x, y)
+
+    def _compute_neighbors(self, x: int, y: int) -> Tuple[Tuple[int, int], ...]:
+        """
+        マスクを参照して上下左右の通行可能な隣接位置を計算
+        """
+        h, w, walk = self.height, self.width, self._walkable_flat
+        cells = ((x + dx, y + dy) for dx, dy in _NEIGHBOR_OFFSETS)
+        return tuple(
+            (nx, ny)
+            for nx, ny in cells
+            if 0 <= nx < h and 0 <= ny < w and walk[nx * w + ny]
+        )
+        
+    def is_connected(self, start: Tuple[int, int], goal: Tuple[int, int]) -> bool:
+        """
+        start から通行可能セルを辿って goal に到達できるかを判定（連結成分ラベルを比較）
+        """
+        if start == goal:
+            return True
+        if not self.is_free(goal):
+            return False
+        labels = self._components()
+        w = self.width
+        goal_label = labels[goal[0] * w + goal[1]]
+        if self.is_free(start):
+            return labels[start[0] * w + start[1]] == goal_label
+        # 通行不可の起点（キッチン・テーブルなど）は隣接セルのいずれかの成分に属すればよい
+        return any(labels[nx * w + ny] == goal_label for nx, ny in self.neighbors(start))
+
+    def _components(self) -> List[int]:
+        """
+        通行可能セルの連結成分ラベル（行優先の1次元リスト、通行不可は0）を返す
+        全セルを一度の幅優先探索で塗り分け、以降の到達判定はラベル比較のみで済ませる
+        """
+        if self._component_labels is not None:
+            return self._component_labels
+
+        w = self.width
+        walk = self._walkable_flat
+        labels = [0] * (self.height * w)
+        label = 0
+        for idx in range(len(labels)):
+            if not walk[idx] or labels[idx]:
+                continue
+            label += 1
+            labels[idx] = label
+            queue = deque([divmod(idx, w)])
+            while queue:
+                current = queue.popleft()
+                for nb in self._adj[current[0] * w + current[1]]:
+                    nb_idx = nb[0] * w + nb[1]
+                    if not labels[nb_idx]:
+                        labels[nb_idx] = label
+                        queue.append(nb)
+        self._component_labels = labels
+        return labels
+
+    def heuristic_map(self, target: Tuple[int, int]) -> List[int]:
+        """
+        全セルから target までのマンハッタン距離を返す（行優先の1次元リスト、x * width + y で参照）
+        目標ごとにNumPyで一括計算し、直近の目標分をキャッシュする
+        """
+        cached = self._heuristic_cache.get(target)
+        if cached is not None:
+            self._heuristic_cache.move_to_end(target)
+            return cached
+
+        rows, cols = np.indices((self.height, self.width))
+        hmap = (np.abs(rows - target[0]) + np.abs(cols - target[1])).ravel().tolist()
+        self._heuristic_cache[target] = hmap
+        if len(self._heuristic_cache) > self.HEURISTIC_CACHE_SIZE:
+            self._heuristic_cache.popitem(last=False)
+        return hmap
+        
+    def render(self, path: Optional[List[Tuple[int, int]]] = None) -> str:
+        """
+        レイアウトをASCII文字列に変換（セル単位のループではなく記号テーブルで一括変換）
+
+        Args:
+            path: 重ねて表示する経路（通行可能セルを「*」で表示）
+
+        Returns:
+            str: 行ごとに「| . # 1 |」形式で連結した文字列
+        """
+        visual = _DISPLAY_SYMBOLS[self._grid_np]
+        
+        # テーブルIDを重ねる（テーブル値2～99のセルのみ、IDがなければ「?」のまま）
+        for (i, j), tid in self.pos_to_table.items():
+            if 0 <= i < self.height and 0 <= j < self.width and 2 <= self._grid_np[i, j] <= 99:
+                visual[i, j] = tid
+        
+        for i, j in path or ():
+            if self.is_free((i, j)):
+                visual[i, j] = "*"
+        
+        return "\n".join("| " + " ".join(row) + " |" for row in visual.tolist())
+
+    def display(self, path: Optional[List[Tuple[int, int]]] = None) -> None:
+        """
+        ASCII形式でレイアウトを出力（全行を一度の書き込みで出力）
+        """
+        sys.stdout.write(self.render(path) + "\n")
         
     def get_delivery_point(self, table_id: str) -> Optional[Tuple[int, int]]:
         """
@@ -128,32 +349,35 @@ class RestaurantLayout:
         Returns:
             dict: 解析後のレイアウト設定を含む
         """
-        height = len(grid_array)
-        width = len(grid_array[0]) if height > 0 else 0
-        grid = [row[:] for row in grid_array]  # ディープコピー
-        
-        table_positions = {}
-        kitchen_positions = []
-        parking_position = None
-        
-        # 特殊位置を抽出
-        for row in range(height):
-            for col in range(width):
-                value = grid[row][col]
-                if value == 101:  # 壁/障害物
-                    grid[row][col] = 1
-                elif 1 <= value <= 99:  # テーブル
-                    table_positions[str(value)] = (row, col)
-                    grid[row][col] = 2
-                elif value == 100:  # キッチン
-                    kitchen_positions.append((row, col))
-                    grid[row][col] = 3
-                elif value == 200:  # 駐車ポイント
-                    parking_position = (row, col)
-                    grid[row][col] = 4
+        if not grid_array:
+            return {
+                "grid": [],
+                "table_positions": {},
+                "kitchen_positions": [],
+                "parking_position": None,
+            }
+
+        # セル単位のPythonループではなく、ブールマスクで一括変換
+        src = np.asarray(grid_array, dtype=np.int64)
+        grid = src.copy()
+        table_mask = (src >= 1) & (src <= 99)
+        grid[src == 101] = RestaurantLayout.WALL
+        grid[table_mask] = RestaurantLayout.TABLE
+        grid[src == 100] = RestaurantLayout.KITCHEN
+        grid[src == 200] = RestaurantLayout.PARKING
+
+        # 特殊位置を抽出（行優先順、元のループと同じ順序）
+        rows, cols = np.nonzero(table_mask)
+        table_positions = {
+            str(value): (row, col)
+            for row, col, value in zip(rows.tolist(), cols.tolist(), src[rows, cols].tolist())
+        }
+        kitchen_positions = [tuple(pos) for pos in np.argwhere(src == 100).tolist()]
+        parking_hits = np.argwhere(src == 200).tolist()
+        parking_position = tuple(parking_hits[-1]) if parking_hits else None
         
         return {
-            "grid": grid,
+            "grid": grid.tolist(),
             "table_positions": table_positions,
             "kitchen_positions": kitchen_positions,
             "parking_position": parking_position,
@@ -1,5 +1,7 @@
+import logging
+
 # 调度层
-from .robot import Robot, AIEnhancedRobot
+from .robot import Robot, AIEnhancedRobot, simulate_fleet
 
 # 规划层
 from .plan import PathPlanner
@@ -8,9 +10,13 @@ from .order import Order, OrderStatus, OrderManager
 # RAG 智能层
 from .rag import RAGModule
 
+# 库默认不输出日志；由调用方（app / 测试脚本）配置 handler 与级别
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
 __all__ = [
     "Robot",
     "AIEnhancedRobot",
+    "simulate_fleet",
     "PathPlanner",
     "OrderManager",
     "Order",
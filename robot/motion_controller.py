@@ -9,8 +9,9 @@
 from __future__ import annotations
 
 import logging
-import time
-from typing import List, Optional, Tuple, Protocol, runtime_checkable
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Deque, List, Optional, Tuple, Protocol, runtime_checkable
 
 from restaurant.restaurant_layout import RestaurantLayout
 from robot.plan import IPathPlanner
@@ -67,10 +68,28 @@ class RAGObstacleHandler(IObstacleHandler):
     """
     基于RAG的智能障碍处理策略
     """
+
+    # 决策缓存容量（同一位置/目标/障碍的情境会反复出现，命中时不再请求 LLM）
+    DECISION_CACHE_SIZE = 512
+    # 是否缓存决策（LLM 输出不确定、需要每次重新询问时设为 False）
+    CACHE_DECISIONS = True
+    # 缓存的动作：只保存与时间无关、同一情境下可直接复用的结论
+    # "wait" 的含义是"稍后再问"，若缓存则重试时永远拿到 "wait"，故不缓存
+    CACHEABLE_DECISIONS = frozenset({"reroute", "report_unreachable"})
+    # "wait" 决策时原地等待的仿真步数（虚拟时间，不阻塞真实时钟）
+    WAIT_TICKS = 5
+    # 同一情境下连续 "wait" 的上限，超过后不再等待，直接重新规划路径
+    MAX_CONSECUTIVE_WAITS = 3
     
     def __init__(self, planner: IPathPlanner, rag: RAGModule) -> None:
         self.planner = planner
         self.rag = rag
+        self._decision_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        # 最近一次 "wait" 决策请求的等待步数，由 MotionController 取走
+        self.requested_wait = 0
+        # 连续 "wait" 的情境与次数（情境变化或得到其他决策时清零）
+        self._wait_situation: Optional[Tuple] = None
+        self._wait_count = 0
     
     def handle_obstacle(
         self, 
@@ -79,22 +98,26 @@ class RAGObstacleHandler(IObstacleHandler):
         obstacle: Tuple[int, int]
     ) -> List[Tuple[int, int]]:
         """调用RAG决策层处理障碍"""
-        decision = self.rag.make_decision(
-            situation_type="obstacle",
-            position=pos,
-            goal=goal,
-            context=obstacle,
-        )
-        logger.info("RAG 决策: %s", decision)
-        
+        decision = self._decide(pos, goal, obstacle)
+        situation = (pos, goal, obstacle)
+        if decision != "wait" or situation != self._wait_situation:
+            self._wait_situation = situation if decision == "wait" else None
+            self._wait_count = 0
+
         # 英文动作关键字处理
         if decision == "reroute" and goal:
             # 重新规划路径
             return self.planner.find_path(pos, goal) or []
         if decision == "wait":
-            # 等待一段时间后再尝试
-            time.sleep(0.5)
-            return []
+            if self._wait_count < self.MAX_CONSECUTIVE_WAITS:
+                # 原地等待若干步后再尝试（由控制器计数，不调用 time.sleep）
+                self._wait_count += 1
+                self.requested_wait = self.WAIT_TICKS
+                return []
+            # 障碍迟迟不消失：放弃等待，按默认行为重新规划
+            logger.info("连续等待 %d 次后障碍仍在，改为重新规划", self._wait_count)
+            self._wait_situation = None
+            self._wait_count = 0
         if decision == "report_unreachable":
             # 标记为不可达，返回空路径
             return []
@@ -102,12 +125,46 @@ class RAGObstacleHandler(IObstacleHandler):
         # 默认行为：尝试重新规划
         return self.planner.find_path(pos, goal) if goal else []
 
+    def _decide(
+        self,
+        pos: Tuple[int, int],
+        goal: Tuple[int, int] | None,
+        obstacle: Tuple[int, int],
+    ) -> str:
+        """带 LRU 缓存的 RAG 决策（相同情境直接复用上次的可缓存动作）"""
+        # 布局版本也作为键的一部分，布局 refresh() 后旧决策自然失效
+        layout = getattr(self.planner, "layout", None)
+        key = ("obstacle", pos, goal, obstacle, getattr(layout, "version", None))
+        cache = self._decision_cache
+        if self.CACHE_DECISIONS:
+            decision = cache.get(key)
+            if decision is not None:
+                cache.move_to_end(key)
+                logger.debug("RAG 决策缓存命中: %s", decision)
+                return decision
+
+        decision = self.rag.make_decision(
+            situation_type="obstacle",
+            position=pos,
+            goal=goal,
+            context=obstacle,
+        )
+        logger.info("RAG 决策: %s", decision)
+        if self.CACHE_DECISIONS and decision in self.CACHEABLE_DECISIONS:
+            cache[key] = decision
+            if len(cache) > self.DECISION_CACHE_SIZE:
+                cache.popitem(last=False)
+        return decision
+
 
 class MotionController:
     """
     机器人底盘控制器：一步移动 + 障碍应对
     """
 
+    # 遇障局部绕行时，在原路径上越过障碍后最多向前查看的格数
+    SPLICE_LOOKAHEAD = 10
+
     def __init__(
         self,
         layout: RestaurantLayout,
@@ -123,6 +180,15 @@ class MotionController:
             self.obstacle_handler = RAGObstacleHandler(planner, rag)
         else:
             self.obstacle_handler = DefaultObstacleHandler(planner)
+        # 无 RAG 时遇障先尝试局部绕行（有 RAG 时每次遇障都交给 RAG 决策）
+        self._splice_on_obstacle = isinstance(self.obstacle_handler, DefaultObstacleHandler)
+        # 剩余的原地等待步数（障碍处理器决定 "wait" 时设置）
+        self._wait_ticks = 0
+
+    @property
+    def is_waiting(self) -> bool:
+        """是否处于障碍前的原地等待中"""
+        return self._wait_ticks > 0
 
     # --------------------------------------------------------------------- #
     # 公共 API
@@ -130,11 +196,12 @@ class MotionController:
     def step(
         self,
         position: Tuple[int, int],
-        path: List[Tuple[int, int]],
+        path: Deque[Tuple[int, int]],
         goal: Tuple[int, int] | None,
-    ) -> Tuple[Tuple[int, int], List[Tuple[int, int]]]:
+    ) -> Tuple[Tuple[int, int], Deque[Tuple[int, int]]]:
         """
         执行一个离散时间步：尝试向 `path[1]` 前进
+        前进时原地弹出队首（O(1)），不再每步复制剩余路径
 
         返回
         ----
@@ -143,11 +210,54 @@ class MotionController:
         if not path:
             return position, path
 
+        if self._wait_ticks:
+            # 等待中：保持原位与原路径，等待结束后重新尝试
+            self._wait_ticks -= 1
+            return position, path
+
         next_pos = path[1] if len(path) > 1 else position
         if self.layout.is_free(next_pos):
-            return next_pos, path[1:]
+            path.popleft()
+            return next_pos, path
 
         # 遇障
         logger.debug("遇到障碍 %s", next_pos)
+        if self._splice_on_obstacle:
+            spliced = self._splice_detour(position, path)
+            if spliced is not None:
+                return position, spliced
         new_path = self.obstacle_handler.handle_obstacle(position, goal, next_pos)
-        return position, new_path
+        wait = getattr(self.obstacle_handler, "requested_wait", 0)
+        if wait:
+            # 本步即为等待的第一步，保留原路径
+            self.obstacle_handler.requested_wait = 0
+            self._wait_ticks = wait - 1
+            return position, path
+        return position, deque(new_path or ())
+
+    # --------------------------------------------------------------------- #
+    # 内部
+    # --------------------------------------------------------------------- #
+    def _splice_detour(
+        self,
+        position: Tuple[int, int],
+        path: Deque[Tuple[int, int]],
+    ) -> Optional[Deque[Tuple[int, int]]]:
+        """
+        局部绕行：规划到障碍之后原路径上第一个可通行格子，再接上原路径剩余部分
+        汇合点距离很近，A* 只需展开障碍附近的一小片区域
+        找不到汇合点或无法到达时返回 None（交由障碍处理器全局重规划）
+        """
+        # path[0] 为当前位置，path[1] 为障碍
+        end = min(len(path), 2 + self.SPLICE_LOOKAHEAD)
+        for k in range(2, end):
+            waypoint = path[k]
+            if not self.layout.is_free(waypoint):
+                continue
+            detour = self.planner.find_path(position, waypoint, allow_expand=False)
+            if not detour:
+                return None
+            spliced = deque(detour)
+            spliced.extend(islice(path, k + 1, None))
+            return spliced
+        return None
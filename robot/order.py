@@ -8,10 +8,12 @@
 
 from __future__ import annotations
 
+import heapq
 import logging
 import time
+from collections import deque
 from enum import Enum, auto
-from typing import Dict, List, Optional
+from typing import Deque, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -32,11 +34,39 @@ class OrderStatus(Enum):
     FAILED = auto()
 
 
+# 状态流转中频繁使用的枚举成员，绑定为模块常量以省去属性查找
+_WAITING = OrderStatus.WAITING
+_PREPARING = OrderStatus.PREPARING
+_READY = OrderStatus.READY
+_DELIVERING = OrderStatus.DELIVERING
+_DELIVERED = OrderStatus.DELIVERED
+_FAILED = OrderStatus.FAILED
+
+
 class Order:
     """
     餐厅订单实体，记录生命周期时间戳
     """
 
+    # 固定属性集合，省去每个实例的 __dict__
+    __slots__ = (
+        "order_id",
+        "table_id",
+        "prep_time",
+        "ready_time",
+        "items",
+        "status",
+        "created_time",
+        "prep_start_time",
+        "delivery_start_time",
+        "delivery_end_time",
+        "delivery_complete_time",
+        "delivery_success",
+        "is_assigned",
+        "assigned_robot_id",
+        "delivery_sequence",
+    )
+
     def __init__(
         self,
         order_id: int,
@@ -60,8 +90,9 @@ class Order:
         self.ready_time = ready_time
         self.items = items or []
 
-        self.status = OrderStatus.WAITING
-        self.created_time = time.time()
+        self.status = _WAITING
+        # 时间戳统一使用单调时钟（只用于计算时间差）
+        self.created_time = time.monotonic()
 
         # 时间戳
         self.prep_start_time: Optional[float] = None
@@ -75,31 +106,32 @@ class Order:
         self.delivery_sequence: Optional[int] = None
 
     # ---- 状态流转 ----------------------------------------------------------
-    def start_preparing(self) -> None:
-        self.status = OrderStatus.PREPARING
-        self.prep_start_time = time.time()
+    # 各方法可传入调用方已读取的时间 now，省略时读取单调时钟
+    def start_preparing(self, now: Optional[float] = None) -> None:
+        self.status = _PREPARING
+        self.prep_start_time = time.monotonic() if now is None else now
 
-    def finish_preparing(self) -> None:
-        self.status = OrderStatus.READY
-        self.ready_time = time.time()
+    def finish_preparing(self, now: Optional[float] = None) -> None:
+        self.status = _READY
+        self.ready_time = time.monotonic() if now is None else now
 
-    def start_delivery(self) -> bool:
-        if self.status != OrderStatus.READY:
+    def start_delivery(self, now: Optional[float] = None) -> bool:
+        if self.status is not _READY:
             return False
-        self.status = OrderStatus.DELIVERING
-        self.delivery_start_time = time.time()
+        self.status = _DELIVERING
+        self.delivery_start_time = time.monotonic() if now is None else now
         return True
 
-    def complete_delivery(self) -> bool:
-        if self.status != OrderStatus.DELIVERING:
+    def complete_delivery(self, now: Optional[float] = None) -> bool:
+        if self.status is not _DELIVERING:
             return False
-        self.status = OrderStatus.DELIVERED
-        self.delivery_end_time = time.time()
+        self.status = _DELIVERED
+        self.delivery_end_time = time.monotonic() if now is None else now
         return True
 
-    def fail_delivery(self) -> None:
-        self.status = OrderStatus.FAILED
-        self.delivery_end_time = time.time()
+    def fail_delivery(self, now: Optional[float] = None) -> None:
+        self.status = _FAILED
+        self.delivery_end_time = time.monotonic() if now is None else now
 
     # ---- 统计 --------------------------------------------------------------
     def total_time(self) -> Optional[float]:
@@ -133,13 +165,20 @@ class OrderManager:
         self._orders: Dict[int, Order] = {}
         self._next_id = 1
 
-        # 队列
-        self.waiting: List[Order] = []
-        self.preparing: List[Order] = []
-        self.ready: List[Order] = []
-        self.delivering: List[Order] = []
-        self.completed: List[Order] = []
-        self.failed: List[Order] = []
+        # 队列：waiting 为先进先出队列，其余状态按 order_id 索引（保持插入顺序）
+        self.waiting: Deque[Order] = deque()
+        self.preparing: Dict[int, Order] = {}
+        self.ready: Dict[int, Order] = {}
+        self.delivering: Dict[int, Order] = {}
+        self.completed: Dict[int, Order] = {}
+        self.failed: Dict[int, Order] = {}
+        # 准备中订单的最小堆 (准备完成时间, order_id)，每个时间片只弹出到期的订单
+        self._prep_heap: List[Tuple[float, int]] = []
+        # 已完成订单耗时的累计值（完成时增量更新，统计时无需遍历）
+        self._delivery_time_sum = 0.0
+        self._delivery_time_count = 0
+        self._total_time_sum = 0.0
+        self._total_time_count = 0
 
     # ---- 创建与状态迁移 -----------------------------------------------------
     def create(
@@ -155,10 +194,11 @@ class OrderManager:
         logger.info("创建订单 %s", order)
         return order
 
-    def _move(self, order: Order, src: List[Order], dst: List[Order]) -> None:
-        if order in src:
-            src.remove(order)
-        dst.append(order)
+    def _move(
+        self, order: Order, src: Dict[int, Order], dst: Dict[int, Order]
+    ) -> None:
+        src.pop(order.order_id, None)
+        dst[order.order_id] = order
 
     # ---- 厨房模拟循环 ------------------------------------------------------
     def tick_kitchen(self) -> None:
@@ -168,25 +208,35 @@ class OrderManager:
         注意: 此方法当前未被直接引用，但保留作为未来扩展功能
         主要用于多机器人场景下的订单准备过程模拟
         """
-        now = time.time()
-
-        # 检查准备完成
-        finished = [
-            od
-            for od in self.preparing
-            if now - (od.prep_start_time or now) >= od.prep_time
-        ]
-        for od in finished:
-            od.finish_preparing()
-            self._move(od, self.preparing, self.ready)
-            logger.debug("订单准备完成 %s", od)
+        # 本次时间片只读取一次时钟，并传给所有状态迁移
+        now = time.monotonic()
+
+        # 检查准备完成（按完成时间从堆顶弹出，已不在准备中的订单直接跳过）
+        heap = self._prep_heap
+        preparing, ready = self.preparing, self.ready
+        finished: List[Order] = []
+        while heap and heap[0][0] <= now:
+            _, order_id = heapq.heappop(heap)
+            od = preparing.get(order_id)
+            if od is None or od.status is not _PREPARING:
+                continue
+            del preparing[order_id]
+            od.finish_preparing(now)
+            ready[order_id] = od
+            finished.append(od)
 
         # 启动新准备
-        while self.waiting and len(self.preparing) < self.MAX_SIMULTANEOUS_PREPARING:
-            od = self.waiting.pop(0)
-            od.start_preparing()
-            self.preparing.append(od)
-            logger.debug("开始准备 %s", od)
+        started: List[Order] = []
+        while self.waiting and len(preparing) < self.MAX_SIMULTANEOUS_PREPARING:
+            od = self.waiting.popleft()
+            od.start_preparing(now)
+            preparing[od.order_id] = od
+            heapq.heappush(heap, (now + od.prep_time, od.order_id))
+            started.append(od)
+
+        # 本次时间片的状态迁移汇总为一条日志
+        if (finished or started) and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("订单准备完成 %s，开始准备 %s", finished, started)
 
     # ---- 配送相关 ----------------------------------------------------------
     def next_ready_order(self) -> Optional[Order]:
@@ -196,7 +246,7 @@ class OrderManager:
         注意: 此方法当前未被直接引用，但保留作为未来扩展功能
         主要用于中心化调度场景下获取下一个待配送订单
         """
-        return self.ready[0] if self.ready else None
+        return next(iter(self.ready.values()), None)
 
     def assign_to_robot(self, order: Order) -> bool:
         """
@@ -205,7 +255,7 @@ class OrderManager:
         注意: 此方法当前未被直接引用，但保留作为未来扩展功能
         主要用于中心化调度场景下的订单分配
         """
-        if order not in self.ready:
+        if order.order_id not in self.ready:
             return False
         order.start_delivery()
         self._move(order, self.ready, self.delivering)
@@ -215,10 +265,19 @@ class OrderManager:
         """
         完成配送
         """
-        if order not in self.delivering:
+        if order.order_id not in self.delivering:
             return False
         order.complete_delivery()
         self._move(order, self.delivering, self.completed)
+
+        delivery_time = order.delivery_time()
+        if delivery_time:
+            self._delivery_time_sum += delivery_time
+            self._delivery_time_count += 1
+        total_time = order.total_time()
+        if total_time:
+            self._total_time_sum += total_time
+            self._total_time_count += 1
         return True
 
     def fail_delivery(self, order: Order) -> None:
@@ -226,9 +285,9 @@ class OrderManager:
         配送失败
         """
         order.fail_delivery()
-        if order in self.ready:
+        if order.order_id in self.ready:
             self._move(order, self.ready, self.failed)
-        elif order in self.delivering:
+        elif order.order_id in self.delivering:
             self._move(order, self.delivering, self.failed)
 
     # ---- 统计 --------------------------------------------------------------
@@ -237,20 +296,20 @@ class OrderManager:
         统计订单相关指标
         """
         total = len(self._orders)
-        delivery_times = [
-            od.delivery_time() for od in self.completed if od.delivery_time()
-        ]
-        total_times = [od.total_time() for od in self.completed if od.total_time()]
         return {
             "total_orders": total,
             "completed": len(self.completed),
             "failed": len(self.failed),
             "success_rate": len(self.completed) / total * 100 if total else 0.0,
             "avg_delivery_time": (
-                sum(delivery_times) / len(delivery_times) if delivery_times else 0.0
+                self._delivery_time_sum / self._delivery_time_count
+                if self._delivery_time_count
+                else 0.0
             ),
             "avg_total_time": (
-                sum(total_times) / len(total_times) if total_times else 0.0
+                self._total_time_sum / self._total_time_count
+                if self._total_time_count
+                else 0.0
             ),
         }
 
@@ -7,8 +7,9 @@ PathPlanner类：基于A*算法，负责在 `RestaurantLayout` 上寻找最短
 
 from __future__ import annotations
 
-import heapq
 import logging
+import weakref
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple, Protocol, runtime_checkable
 
 from restaurant.restaurant_layout import RestaurantLayout
@@ -53,17 +54,32 @@ class PathPlanner(IPathPlanner):
     基于 A* 的网格路径规划器
     """
 
+    # 路径缓存的最大条目数（同一布局上的机器人共用一个规划器与缓存）
+    PATH_CACHE_SIZE = 1024
+
+    # 布局 id -> 共享的规划器（规划器持有布局，条目存续期间 id 不会被复用）
+    _shared: "weakref.WeakValueDictionary[int, PathPlanner]" = weakref.WeakValueDictionary()
+
     def __init__(self, layout: RestaurantLayout) -> None:
         self.layout = layout
+        # (起点, 终点, 是否扩圈, 布局版本) -> 路径（元组，None 表示无路径）
+        self._path_cache: "OrderedDict[tuple, Optional[Tuple[Tuple[int, int], ...]]]" = OrderedDict()
+        # A* 的前驱表在多次搜索间复用（只读取本次写入过的格子，无需每次清空）
+        self._came_from: List[int] = []
 
-    # ---- A* ----------------------------------------------------------------
-    @staticmethod
-    def _heuristic(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+    @classmethod
+    def for_layout(cls, layout: RestaurantLayout) -> "PathPlanner":
         """
-        曼哈顿距离启发函数
+        返回该布局共享的规划器实例（不存在时新建）
+        同一布局上的多台机器人共用路径缓存；所有使用者释放后自动回收
         """
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+        planner = cls._shared.get(id(layout))
+        if planner is None or type(planner) is not cls:
+            planner = cls(layout)
+            cls._shared[id(layout)] = planner
+        return planner
 
+    # ---- A* ----------------------------------------------------------------
     def find_path(
         self,
         start: Tuple[int, int],
@@ -74,14 +90,35 @@ class PathPlanner(IPathPlanner):
         搜索从 *start* 到 *goal* 的路径
         若目标四邻域被完全阻塞且 `allow_expand=True`
         将在 2–3 曼哈顿距离半径内寻找最近可达点作为临时目标
+        结果按布局版本缓存，布局 `refresh()` 后自动失效；每次返回新的列表
         """
-        logger.debug("路径规划: %s -> %s", start, goal)
+        key = (start, goal, allow_expand, self.layout.version)
+        cache = self._path_cache
+        if key in cache:
+            cache.move_to_end(key)
+            cached = cache[key]
+            return list(cached) if cached is not None else None
+
+        path = self._find_path_uncached(start, goal, allow_expand)
+        cache[key] = tuple(path) if path is not None else None
+        if len(cache) > self.PATH_CACHE_SIZE:
+            cache.popitem(last=False)
+        return path
+
+    def _find_path_uncached(
+        self,
+        start: Tuple[int, int],
+        goal: Tuple[int, int],
+        allow_expand: bool,
+    ) -> Optional[List[Tuple[int, int]]]:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "路径规划: %s -> %s（目标可通行邻居: %s）",
+                start, goal, self.layout.neighbors(goal),
+            )
 
-        # 若四邻域可达直接 A*
-        if any(
-            self.layout.is_free((goal[0] + dx, goal[1] + dy))
-            for dx, dy in ((0, 1), (1, 0), (0, -1), (-1, 0))
-        ):
+        # 若四邻域可达直接 A*（直接读取布局预计算的可通行邻居，无需逐个 is_free）
+        if self.layout.neighbors(goal):
             return self._a_star(start, goal)
 
         if not allow_expand:
@@ -89,54 +126,146 @@ class PathPlanner(IPathPlanner):
             return None
 
         logger.warning("目标周围被封锁，扩大搜索半径")
-        for radius in range(2, 4):  # 半径 2~3
-            for dx in range(-radius, radius + 1):
-                for dy in range(-radius, radius + 1):
-                    if abs(dx) + abs(dy) > radius:
-                        continue
-                    nx, ny = goal[0] + dx, goal[1] + dy
-                    if self.layout.is_free((nx, ny)):
-                        path = self._a_star(start, (nx, ny))
-                        if path:
-                            logger.info("找到临时目标 %s 的替代路径", (nx, ny))
-                            return path
+        temp_goal = self._nearest_reachable(start, goal)
+        if temp_goal is not None:
+            path = self._a_star(start, temp_goal)
+            if path:
+                logger.info("找到临时目标 %s 的替代路径", temp_goal)
+                return path
         logger.error("在扩圈后仍无法找到路径")
         return None
 
+    def _nearest_reachable(
+        self,
+        start: Tuple[int, int],
+        goal: Tuple[int, int],
+        max_radius: int = 3,
+    ) -> Optional[Tuple[int, int]]:
+        """
+        按曼哈顿距离 2..max_radius 由近到远逐圈检查 *goal* 周围的格子
+        返回第一个可通行且与 *start* 连通的格子（连通性查布局的连通分量，无需逐个 A*）
+        """
+        layout = self.layout
+        gx, gy = goal
+        for radius in range(2, max_radius + 1):
+            for dx in range(-radius, radius + 1):
+                rest = radius - abs(dx)
+                for dy in ((-rest, rest) if rest else (0,)):
+                    cell = (gx + dx, gy + dy)
+                    if layout.is_free(cell) and layout.is_connected(start, cell):
+                        return cell
+        return None
+
+    def distance_field(self, start: Tuple[int, int]) -> List[int]:
+        """
+        从 *start* 出发的单位步长 BFS 距离场（按格子编号 x * width + y 索引，不可达为 -1）
+        一次遍历即得到到所有格子的最短步数，批量求多个目标的路径长度时代替逐对 A*
+        """
+        layout = self.layout
+        height, width = layout.height, layout.width
+        field = [-1] * (height * width)
+        if not (0 <= start[0] < height and 0 <= start[1] < width):
+            return field
+
+        adj = layout.neighbor_ids
+        start_id = start[0] * width + start[1]
+        field[start_id] = 0
+        frontier = [start_id]
+        dist = 0
+        while frontier:
+            dist += 1
+            next_frontier = []
+            for current in frontier:
+                for nb in adj[current]:
+                    if field[nb] < 0:
+                        field[nb] = dist
+                        next_frontier.append(nb)
+            frontier = next_frontier
+        return field
+
     # ---- internal ----------------------------------------------------------
     def _a_star(
         self, start: Tuple[int, int], goal: Tuple[int, int]
     ) -> Optional[List[Tuple[int, int]]]:
+        if start == goal:
+            return [start]
+
         layout = self.layout
-        open_heap: List[Tuple[int, Tuple[int, int]]] = []
-        heapq.heappush(open_heap, (0, start))
-        came_from: Dict[Tuple[int, int], Tuple[int, int]] = {}
-        g_score: Dict[Tuple[int, int], int] = {start: 0}
-
-        while open_heap:
-            _, current = heapq.heappop(open_heap)
-            if current == goal:
-                return self._reconstruct(came_from, current)
-
-            for nb in layout.neighbors(current):
-                tentative = g_score[current] + 1
-                if tentative < g_score.get(nb, float("inf")):
+        height, width = layout.height, layout.width
+        if not (0 <= start[0] < height and 0 <= start[1] < width):
+            logger.warning("A* 失败: 起点越界 %s", start)
+            return None
+        # 起点与终点不在同一连通分量时直接失败，免去展开整个可达区域
+        if not layout.is_connected(start, goal):
+            logger.warning("A* 失败: %s -> %s 不连通", start, goal)
+            return None
+
+        # 格子编码为 x * width + y，g 值与前驱存放在按编号索引的列表中（无需元组哈希）
+        start_id = start[0] * width + start[1]
+        goal_id = (
+            goal[0] * width + goal[1]
+            if 0 <= goal[0] < height and 0 <= goal[1] < width
+            else -1
+        )
+        size = height * width
+        # 目标固定，启发值直接查布局缓存的距离表
+        hmap = layout.heuristic_map(goal)
+        adj = layout.neighbor_ids
+
+        came_from = self._came_from
+        if len(came_from) != size:
+            came_from = self._came_from = [-1] * size
+        # 回溯只经过本次搜索写入的格子，终止于起点
+        came_from[start_id] = -1
+        g_score: List[float] = [float("inf")] * size
+        g_score[start_id] = 0
+        # 已展开格子（曼哈顿启发函数是一致的，出桶即为最优，过期的元素直接跳过）
+        closed = bytearray(size)
+
+        # 桶队列：单位代价四连通网格上 f 为整数且单调不减，按 f 分桶代替堆（入桶/出桶 O(1)）
+        # 同一桶内后进先出：优先展开最近生成、通常离目标更近的格子
+        f = hmap[start_id]
+        buckets: Dict[int, List[int]] = {f: [start_id]}
+        bucket = buckets[f]
+
+        while True:
+            if not bucket:
+                del buckets[f]
+                if not buckets:
+                    break
+                f = min(buckets)
+                bucket = buckets[f]
+                continue
+            current = bucket.pop()
+            if closed[current]:
+                continue
+            if current == goal_id:
+                return self._reconstruct(came_from, current, width)
+            closed[current] = 1
+
+            tentative = g_score[current] + 1
+            for nb in adj[current]:
+                if not closed[nb] and tentative < g_score[nb]:
                     came_from[nb] = current
                     g_score[nb] = tentative
-                    f_score = tentative + self._heuristic(nb, goal)
-                    heapq.heappush(open_heap, (f_score, nb))
+                    nf = tentative + hmap[nb]
+                    if nf == f:
+                        bucket.append(nb)
+                    elif nf in buckets:
+                        buckets[nf].append(nb)
+                    else:
+                        buckets[nf] = [nb]
 
         logger.warning("A* 失败: %s -> %s", start, goal)
         return None
 
     @staticmethod
     def _reconstruct(
-        came_from: Dict[Tuple[int, int], Tuple[int, int]],
-        current: Tuple[int, int],
+        came_from: List[int], current: int, width: int
     ) -> List[Tuple[int, int]]:
-        path = [current]
-        while current in came_from:
+        path = [divmod(current, width)]
+        while came_from[current] != -1:
             current = came_from[current]
-            path.append(current)
+            path.append(divmod(current, width))
         path.reverse()
         return path
@@ -8,13 +8,18 @@ import json
 import logging
 import os
 import pickle
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 
-import faiss
 import numpy as np
 
 from .llm_client import LLMClient
 
+# faissはインポートが重いため、RAGを使わない場合に読み込まれないよう各メソッド内でインポートする
+if TYPE_CHECKING:
+    import faiss
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +28,18 @@ class KnowledgeBase:
     知識ベース管理クラス：文書のローディング、ベクトル化、保存、検索を行う
     """
 
+    # 1回の埋め込みAPI呼び出しで送る文書数
+    EMBED_BATCH_SIZE = 256
+    # この件数以上の文書はPQ（直積量子化）で圧縮して保持する
+    PQ_MIN_DOCS = 10_000
+    PQ_SUBQUANTIZERS = 48    # 1536次元 → 1ベクトルあたり48バイト
+    PQ_NBITS = 8
+    PQ_TRAIN_SIZE = 65_536   # 学習に使う最大ベクトル数
+    # クエリ埋め込みキャッシュの最大件数
+    QUERY_CACHE_SIZE = 256
+    # この件数を超え、GPUが利用可能な場合は検索用インデックスをGPUに載せる
+    GPU_MIN_DOCS = 10_000
+
     def __init__(
         self,
         knowledge_dir: str,
@@ -54,11 +71,19 @@ class KnowledgeBase:
         self.docs: List[Dict[str, Any]] = []
         self.doc_contents: List[str] = []
         self.index: Optional[faiss.Index] = None
+        # 検索に使うインデックス（GPU版 or self.index）。保存は常にCPU版のself.indexで行う
+        self._search_index: Optional[faiss.Index] = None
+        self._gpu_resources = None
         self.embeddings: Optional[np.ndarray] = None
+        # クエリ文字列 → 正規化済み埋め込み（LRU）
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # 共有インスタンスは複数スレッドから検索されるため、キャッシュ操作はロック下で行う
+        self._query_cache_lock = threading.Lock()
         
         # インデックスパス
         self.index_path = os.path.join(self.vector_db_dir, "faiss_index.bin")
         self.docs_path = os.path.join(self.vector_db_dir, "documents.pkl")
+        self.embeddings_path = os.path.join(self.vector_db_dir, "embeddings.npy")
         
         # 既存のベクトルDBがあれば読み込み、なければ構築
         if os.path.exists(self.index_path) and os.path.exists(self.docs_path):
@@ -120,38 +145,139 @@ class KnowledgeBase:
         logger.info(f"合計{len(all_docs)}件の知識スニペットをロードしました")
         return all_docs
 
+    @staticmethod
+    def _deduplicate_docs(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        内容が同一の文書（空白・大文字小文字の違いは無視）を1件にまとめる
+        まとめられた文書のソースは残した文書の "aliases" に記録する
+
+        Args:
+            docs: 文書オブジェクトのリスト
+
+        Returns:
+            List[Dict[str, Any]]: 重複を除いた文書のリスト（元の順序を維持）
+        """
+        unique: Dict[str, Dict[str, Any]] = {}
+        for doc in docs:
+            key = " ".join(str(doc["content"]).split()).lower()
+            kept = unique.get(key)
+            if kept is None:
+                unique[key] = dict(doc)
+            else:
+                kept.setdefault("aliases", []).append(doc.get("source", "unknown"))
+        
+        removed = len(docs) - len(unique)
+        if removed:
+            logger.info(f"重複した知識スニペットを{removed}件まとめました")
+        return list(unique.values())
+
     def _build_vector_db(self) -> None:
         """
         ベクトルデータベースを構築してディスクに保存する
         """
-        # 文書をロード
-        self.docs = self._load_docs_from_dir()
+        import faiss
+
+        # 文書をロード（重複文書は埋め込み前にまとめる）
+        self.docs = self._deduplicate_docs(self._load_docs_from_dir())
         self.doc_contents = [doc["content"] for doc in self.docs]
         
         if not self.doc_contents:
             logger.warning("文書が見つかりませんでした。空のインデックスを作成します。")
             # 空のインデックスを作成（1次元の埋め込みでダミーインデックスを作成）
             dummy_embed = np.zeros((1, 1536), dtype=np.float32)  # OpenAIのembedding次元は1536
-            self.index = faiss.IndexFlatL2(1536)
+            self.index = faiss.IndexFlatIP(1536)
             self.embeddings = dummy_embed
         else:
-            # 文書をベクトル化
-            logger.info(f"{len(self.doc_contents)}件の文書を埋め込みます...")
-            self.embeddings = self.llm.embed(self.doc_contents, model=self.embed_model)
+            # 文書をバッチごとにベクトル化し、ディスク上の行列へ逐次書き込む
+            # （全文書分の行列をメモリ上に持たない）
+            n = len(self.doc_contents)
+            logger.info(f"{n}件の文書を埋め込みます...")
+            self.embeddings = None
+            for start in range(0, n, self.EMBED_BATCH_SIZE):
+                batch = self.llm.embed(
+                    self.doc_contents[start:start + self.EMBED_BATCH_SIZE],
+                    model=self.embed_model,
+                )
+                # L2正規化して内積＝コサイン類似度とする
+                faiss.normalize_L2(batch)
+                if self.embeddings is None:
+                    # 最初のバッチで次元数が分かった時点で行列を確保
+                    self.embeddings = np.lib.format.open_memmap(
+                        self.embeddings_path,
+                        mode="w+",
+                        dtype=np.float32,
+                        shape=(n, batch.shape[1]),
+                    )
+                self.embeddings[start:start + len(batch)] = batch
+            self.embeddings.flush()
             
             # FAISSインデックスを構築
-            dim = self.embeddings.shape[1]
-            self.index = faiss.IndexFlatL2(dim)
-            self.index.add(self.embeddings)
-            logger.info(f"FAISSインデックスを構築しました (dim={dim})")
+            self.index = self._create_index(self.embeddings)
+            logger.info(
+                f"FAISSインデックスを構築しました (dim={self.index.d}, type={type(self.index).__name__})"
+            )
         
         # ディスクに保存
         self._save_vector_db()
+        self._prepare_search_index()
+
+    def _prepare_search_index(self) -> None:
+        """
+        大規模な知識ベースでGPUが利用可能な場合、検索用にインデックスをGPUへコピーする
+        CPU版のself.indexは保存とフォールバック用に保持する
+        """
+        import faiss
+
+        self._search_index = self.index
+        if (
+            self.index is None
+            or self.index.ntotal <= self.GPU_MIN_DOCS
+            or not hasattr(faiss, "StandardGpuResources")
+            or faiss.get_num_gpus() == 0
+        ):
+            return
+        try:
+            self._gpu_resources = faiss.StandardGpuResources()
+            self._search_index = faiss.index_cpu_to_gpu(self._gpu_resources, 0, self.index)
+            logger.info(f"検索用インデックスをGPUに配置しました ({self.index.ntotal}件)")
+        except Exception as e:
+            logger.warning(f"GPUへのインデックス配置に失敗しました。CPUで検索します: {e}")
+            self._search_index = self.index
+
+    def _create_index(self, embeddings: np.ndarray) -> faiss.Index:
+        """
+        正規化済みの埋め込み行列から内積インデックスを作成する
+        大規模な知識ベースではPQコードに圧縮し、常駐メモリとスキャン量を削減する
+
+        Args:
+            embeddings: (文書数, 次元数) のfloat32行列（メモリマップ可）
+
+        Returns:
+            faiss.Index: ベクトルを追加済みのインデックス
+        """
+        import faiss
+
+        n, dim = embeddings.shape
+        if n >= self.PQ_MIN_DOCS and dim % self.PQ_SUBQUANTIZERS == 0:
+            index = faiss.IndexPQ(
+                dim, self.PQ_SUBQUANTIZERS, self.PQ_NBITS, faiss.METRIC_INNER_PRODUCT
+            )
+            # 行列全体から等間隔にサンプリングして学習
+            step = max(1, n // self.PQ_TRAIN_SIZE)
+            index.train(np.ascontiguousarray(embeddings[::step]))
+        else:
+            index = faiss.IndexFlatIP(dim)
+        
+        for start in range(0, n, self.EMBED_BATCH_SIZE):
+            index.add(np.ascontiguousarray(embeddings[start:start + self.EMBED_BATCH_SIZE]))
+        return index
 
     def _save_vector_db(self) -> None:
         """
         ベクトルDBをディスクに保存
         """
+        import faiss
+
         # FAISSインデックスを保存
         faiss.write_index(self.index, self.index_path)
         
@@ -168,6 +294,8 @@ class KnowledgeBase:
         """
         保存済みのベクトルDBを読み込む
         """
+        import faiss
+
         try:
             # FAISSインデックスを読み込む
             self.index = faiss.read_index(self.index_path)
@@ -180,15 +308,25 @@ class KnowledgeBase:
             
             logger.info(f"ベクトルDBを読み込みました: {len(self.doc_contents)}件")
             
-            # 埋め込みを取得
-            if hasattr(self.index, 'xb'):
-                self.embeddings = self.index.xb
-            else:
-                # IndexFlatL2の場合は再構築
-                logger.info("埋め込みを再構築中...")
-                self.embeddings = np.zeros((len(self.doc_contents), self.index.d), dtype=np.float32)
-                for i in range(len(self.doc_contents)):
-                    self.embeddings[i] = self.llm.embed([self.doc_contents[i]], model=self.embed_model)[0]
+            # 旧形式（L2インデックス）の場合は正規化して内積インデックスに移行
+            if self.index.metric_type != faiss.METRIC_INNER_PRODUCT:
+                logger.info("L2インデックスを内積（コサイン類似度）インデックスに移行します")
+                embeddings = self.index.reconstruct_n(0, self.index.ntotal)
+                faiss.normalize_L2(embeddings)
+                self.index = faiss.IndexFlatIP(self.index.d)
+                self.index.add(embeddings)
+                np.save(self.embeddings_path, embeddings)
+                self._save_vector_db()
+            
+            # 埋め込み行列はメモリマップで遅延読み込み（APIで再埋め込みしない）
+            self.embeddings = None
+            if os.path.exists(self.embeddings_path):
+                self.embeddings = np.load(self.embeddings_path, mmap_mode="r")
+            if self.embeddings is None or len(self.embeddings) != self.index.ntotal:
+                # 行列ファイルがない場合はインデックスに格納済みのベクトルを復元
+                self.embeddings = self.index.reconstruct_n(0, self.index.ntotal)
+            
+            self._prepare_search_index()
             
         except Exception as e:
             logger.error(f"ベクトルDB読み込みエラー: {e}")
@@ -196,36 +334,119 @@ class KnowledgeBase:
             logger.info("ベクトルDBを再構築します...")
             self._build_vector_db()
 
-    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        クエリをL2正規化済みの埋め込みに変換（同一クエリはキャッシュから返し、APIを呼ばない）
+
+        Args:
+            query: 検索クエリ
+
+        Returns:
+            np.ndarray: 形状 (1, 次元数) のfloat32ベクトル
+        """
+        return self.embed_queries([query])
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        複数クエリをまとめて埋め込みに変換
+        キャッシュにないクエリだけを1回のAPI呼び出しで埋め込む
+
+        Args:
+            queries: 検索クエリのリスト
+
+        Returns:
+            np.ndarray: 形状 (クエリ数, 次元数) のfloat32行列
+        """
+        import faiss
+
+        vectors: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+        with self._query_cache_lock:
+            for query in dict.fromkeys(queries):
+                cached = self._query_cache.get(query)
+                if cached is None:
+                    missing.append(query)
+                else:
+                    self._query_cache.move_to_end(query)
+                    vectors[query] = cached
+        
+        if missing:
+            # API呼び出しはロックの外で行う（他スレッドのキャッシュ参照を待たせない）
+            embedded = self.llm.embed(missing, model=self.embed_model)
+            faiss.normalize_L2(embedded)
+            embedded.flags.writeable = False  # キャッシュ内の行は共有されるため読み取り専用
+            with self._query_cache_lock:
+                for query, vector in zip(missing, embedded):
+                    vectors[query] = vector
+                    self._query_cache[query] = vector
+                while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+        
+        return np.stack([vectors[query] for query in queries])
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 3,
+        query_vector: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, Any]]:
         """
         クエリに基づいて最も関連性の高い文書を検索
 
         Args:
             query: 検索クエリ
             top_k: 返す結果の数
+            query_vector: 計算済みのクエリ埋め込み（embed_query()の結果）。省略時はqueryから求める
 
         Returns:
             List[Dict[str, Any]]: 検索結果の文書オブジェクト
         """
+        return self.search_batch([query], top_k=top_k, query_vectors=query_vector)[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 3,
+        query_vectors: Optional[np.ndarray] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        複数クエリをまとめて検索（埋め込み1回 + FAISS検索1回）
+
+        Args:
+            queries: 検索クエリのリスト
+            top_k: クエリごとに返す結果の数
+            query_vectors: 計算済みのクエリ埋め込み行列。省略時はqueriesから求める
+
+        Returns:
+            List[List[Dict[str, Any]]]: クエリごとの検索結果の文書オブジェクト
+        """
         if not self.index or not self.docs:
             logger.warning("検索するインデックスまたは文書がありません")
+            return [[] for _ in queries]
+        if not queries:
             return []
         
-        # クエリをベクトル化
-        query_vector = self.llm.embed([query], model=self.embed_model)
+        # クエリをベクトル化（文書と同様にL2正規化、キャッシュ済みなら再利用）
+        if query_vectors is None:
+            query_vectors = self.embed_queries(queries)
         
         # FAISSで検索
-        distances, indices = self.index.search(query_vector, top_k)
+        distances, indices = (self._search_index or self.index).search(
+            np.ascontiguousarray(query_vectors, dtype=np.float32), top_k
+        )
         
-        # 結果を整形
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.docs):
-                doc = self.docs[idx].copy()
-                doc['score'] = float(distances[0][i])
-                results.append(doc)
+        # 結果を整形（scoreはコサイン類似度、大きいほど関連性が高い）
+        all_results = []
+        for row_distances, row_indices in zip(distances, indices):
+            results = []
+            for distance, idx in zip(row_distances, row_indices):
+                if 0 <= idx < len(self.docs):
+                    doc = self.docs[idx].copy()
+                    doc['score'] = float(distance)
+                    results.append(doc)
+            all_results.append(results)
         
-        return results
+        return all_results
     
     def get_content_from_results(self, results: List[Dict[str, Any]]) -> List[str]:
         """
@@ -4,14 +4,14 @@ OpenAI API（嵌入 + ChatCompletion）
 
 from __future__ import annotations
 
+import logging
 import os
 import dotenv
 from typing import List
 
 import numpy as np
-from openai import OpenAI
 
-dotenv.load_dotenv()
+logger = logging.getLogger(__name__)
 
 class LLMClient:
     """
@@ -19,9 +19,14 @@ class LLMClient:
     """
 
     def __init__(self, api_key: str | None = None) -> None:
+        if api_key is None:
+            dotenv.load_dotenv()
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise RuntimeError("OPENAI_API_KEY not provided")
+        # openai 包较重，仅在真正创建客户端时导入
+        from openai import OpenAI
+
         self.client = OpenAI(api_key=self.api_key)
 
     def embed(
@@ -31,7 +36,13 @@ class LLMClient:
         嵌入文本
         """
         resp = self.client.embeddings.create(model=model, input=texts)
-        return np.array([item.embedding for item in resp.data], dtype="float32")
+        # 直接按 float32 预分配并逐行填充，避免中间 list 与 float64 拷贝
+        n = len(resp.data)
+        dim = len(resp.data[0].embedding) if n else 0
+        embeddings = np.empty((n, dim), dtype=np.float32)
+        for i, item in enumerate(resp.data):
+            embeddings[i] = item.embedding
+        return embeddings
 
     def chat(self, system: str, user: str, model: str = "gpt-4o", **kw) -> str:
         """
@@ -45,4 +56,12 @@ class LLMClient:
             ],
             **kw,
         )
+        # 前缀缓存命中情况（固定的 system 提示会被服务端缓存复用）
+        details = getattr(resp.usage, "prompt_tokens_details", None) if resp.usage else None
+        if details is not None:
+            logger.debug(
+                "chat tokens: prompt=%s cached=%s",
+                resp.usage.prompt_tokens,
+                getattr(details, "cached_tokens", None),
+            )
         return resp.choices[0].message.content.strip()
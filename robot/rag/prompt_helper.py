@@ -3,7 +3,7 @@ Prompt拼接系统 / user 提示，并抽取关键词式决策
 """
 
 from __future__ import annotations
-from typing import Tuple
+from typing import List, Tuple
 
 
 class PromptHelper:
@@ -26,6 +26,17 @@ class PromptHelper:
             "Please suggest improvements or identify potential issues."
         )
 
+    @staticmethod
+    def build_user_message(query: str, context: List[str]) -> str:
+        """
+        检索到的参考信息 + 问题，拼成 user 消息
+        system 提示保持固定不变，使请求前缀可被服务端 prompt 缓存复用
+        """
+        if not context:
+            return query
+        refs = "\n".join(f"- {doc}" for doc in context)
+        return f"相关参考信息:\n{refs}\n\n问题:\n{query}"
+
     @staticmethod
     def simplify(decision: str) -> str:
         d = decision.lower()
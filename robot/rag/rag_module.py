@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import logging
 import os
+import threading
 from typing import List, Dict, Any, Tuple
 
 from .llm_client import LLMClient
@@ -21,6 +22,14 @@ class RAGModule:
     Robot 调用的智能决策模块
     """
 
+    # 固定的 system 提示（每次请求完全相同，便于服务端前缀缓存命中）
+    SYSTEM_PROMPT_GENERIC = "你是一个知识丰富的助手，请依据提供的上下文回答问题。"
+    SYSTEM_PROMPT_DECISION = "你是机器人控制器，依据情境给出最佳决策。"
+    # (api_key, knowledge_dir, vector_db_dir, top_k) -> 共享实例
+    _shared: Dict[Tuple, "RAGModule"] = {}
+    # 共享实例表的锁（Streamlit 的多个会话线程会同时调用 shared()）
+    _shared_lock = threading.Lock()
+
     def __init__(
         self,
         api_key: str | None = None,
@@ -55,6 +64,41 @@ class RAGModule:
             self.retriever = None
             logger.warning(f"知識ディレクトリが見つかりません: {knowledge_dir}; RAGはゼロショットにフォールバックします。")
 
+    @classmethod
+    def shared(
+        cls,
+        api_key: str | None = None,
+        knowledge_dir: str | None = None,
+        vector_db_dir: str | None = None,
+        top_k: int = 3,
+    ) -> "RAGModule":
+        """
+        按配置返回共享实例（首次调用时创建）
+        知识库加载与 LLM 客户端创建只做一次，多台机器人共用
+        """
+        key = (api_key, knowledge_dir, vector_db_dir, top_k)
+        # 持锁创建，避免并发的首次调用重复加载知识库
+        with cls._shared_lock:
+            module = cls._shared.get(key)
+            if module is None:
+                module = cls(
+                    api_key=api_key,
+                    knowledge_dir=knowledge_dir,
+                    vector_db_dir=vector_db_dir,
+                    top_k=top_k,
+                )
+                cls._shared[key] = module
+        return module
+
+    @classmethod
+    def clear_shared(cls) -> None:
+        """
+        清空共享实例（配置或知识库变更后调用，下次 shared() 会重新创建）
+        已持有旧实例的机器人不受影响
+        """
+        with cls._shared_lock:
+            cls._shared.clear()
+
     # ---------------- 公共 ---------------- #
     def is_ready(self) -> bool:
         """
@@ -114,14 +158,11 @@ class RAGModule:
             # 检索相关文档
             context = self._get_rag_context(query)
             
-        # 构建系统提示
-        system_prompt = "你是一个知识丰富的助手，请依据提供的上下文回答问题。"
-        if context:
-            # 将检索到的文档添加到系统提示中
-            system_prompt += "\n\n相关参考信息:\n" + "\n\n".join([f"- {doc}" for doc in context])
-        
-        # 调用LLM生成回答
-        return self.llm.chat(system=system_prompt, user=query)
+        # 调用LLM生成回答（检索到的文档放在 user 消息中，system 提示保持固定）
+        return self.llm.chat(
+            system=self.SYSTEM_PROMPT_GENERIC,
+            user=PromptHelper.build_user_message(query, context),
+        )
     
     def trigger_layer(self, event: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -157,10 +198,10 @@ class RAGModule:
         思考层：检索知识并调用LLM生成回答，返回(raw_response, context)
         """
         context = self._get_rag_context(query) if use_rag and self.is_ready() else []
-        system_prompt = "你是一个知识丰富的助手，请依据提供的上下文回答问题。"
-        if context:
-            system_prompt += "\n\n相关参考信息:\n" + "\n\n".join([f"- {doc}" for doc in context])
-        raw_response = self.llm.chat(system=system_prompt, user=query)
+        raw_response = self.llm.chat(
+            system=self.SYSTEM_PROMPT_GENERIC,
+            user=PromptHelper.build_user_message(query, context),
+        )
         return raw_response, context
 
     def decision_layer(self, raw_response: str) -> str:
@@ -223,11 +264,10 @@ class RAGModule:
         """基于RAG获取决策结果"""
         context = self._get_rag_context(query) if self.is_ready() else []
         
-        system_prompt = "你是机器人控制器，依据情境给出最佳决策。"
-        if context:
-            system_prompt += "\n\n参考知识：\n" + "\n".join([f"- {doc}" for doc in context])
-        
-        decision = self.llm.chat(system=system_prompt, user=query)
+        decision = self.llm.chat(
+            system=self.SYSTEM_PROMPT_DECISION,
+            user=PromptHelper.build_user_message(query, context),
+        )
         simplified = PromptHelper.simplify(decision)
         
         return {
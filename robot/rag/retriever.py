@@ -37,16 +37,17 @@ class Retriever:
         Returns:
             List[str]: 関連文書の内容リスト
         """
-        logger.debug(f"検索クエリ: {query}")
+        logger.debug("検索クエリ: %s", query)
         
         # 知識ベースから検索
         search_results = self.kb.search(query, top_k=top_k)
         
-        # 結果のスコアをログに記録
-        for i, doc in enumerate(search_results):
-            score = doc.get('score', 0.0)
-            source = doc.get('source', 'unknown')
-            logger.debug(f"検索結果 #{i+1}: スコア={score:.4f}, ソース={source}")
+        # 結果のスコアをログに記録（DEBUG無効時はループごと省略）
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, doc in enumerate(search_results):
+                score = doc.get('score', 0.0)
+                source = doc.get('source', 'unknown')
+                logger.debug("検索結果 #%d: スコア=%.4f, ソース=%s", i + 1, score, source)
         
         # 内容のみを抽出して返す
         contents = self.kb.get_content_from_results(search_results)
@@ -13,6 +13,7 @@ from typing import Optional
 
 from robot.rag.llm_client import LLMClient
 from robot.rag.knowledge_base import KnowledgeBase
+from robot.rag.rag_module import RAGModule
 
 # ロギング設定
 logging.basicConfig(
@@ -93,6 +94,8 @@ def update_knowledge_base(
         # 知識ベースの初期化と更新
         kb = KnowledgeBase(knowledge_dir, llm, vector_db_dir=vector_db_dir)
         kb.update_knowledge_base()
+        # 共有中のRAGモジュールは更新前の知識ベースを保持しているため破棄する
+        RAGModule.clear_shared()
         
         logger.info("知識ベースの更新が完了しました")
         return True
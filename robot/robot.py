@@ -8,16 +8,20 @@
 * MotionController        — アクション層（robot.motion_controller）
 * Robot / AIEnhancedRobot — スケジューリング層（本ファイル）
 * RobotStatistics         - 統計層（本ファイル）
+* simulate_fleet          — 複数ロボットの並列シミュレーション（本ファイル）
 """
 
 from __future__ import annotations
 
+import copy
 import logging
-import os
-from typing import List, Optional, Tuple, Deque, Dict, Any, Protocol, runtime_checkable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple, Deque, Dict, Any, Protocol, runtime_checkable
 from collections import deque
 import time
 
+import numpy as np
+
 from restaurant.restaurant_layout import RestaurantLayout
 from robot.motion_controller import MotionController
 from robot.plan import PathPlanner, IPathPlanner
@@ -55,14 +59,25 @@ class RobotStatistics:
     """
     ロボット統計データを収集・管理するクラス
     """
+
+    # パス履歴バッファの初期容量（満杯になると倍に拡張）
+    HISTORY_INITIAL_CAPACITY = 1024
+    # パス履歴の座標型（int16 では 32767 を超える座標が黙って桁あふれするため int32、1点8バイト）
+    HISTORY_DTYPE = np.int32
     
-    def __init__(self, robot_type: str, restaurant_name: str) -> None:
+    def __init__(
+        self,
+        robot_type: str,
+        restaurant_name: str,
+        history_capacity: Optional[int] = None,
+    ) -> None:
         """
         統計クラスの初期化
         
         Args:
             robot_type: ロボットタイプ（"基本ロボット"または"インテリジェントRAGロボット"）
             restaurant_name: レストラン名
+            history_capacity: パス履歴バッファの初期容量（省略時は HISTORY_INITIAL_CAPACITY）
         """
         self.robot_type = robot_type
         self.restaurant_name = restaurant_name
@@ -78,12 +93,29 @@ class RobotStatistics:
         # 配達履歴
         self._delivery_history = []
         
-        # パス履歴
-        self.path_history: list[tuple[int, int]] = []
+        # パス履歴（(容量, 2) の座標バッファと有効長。連続配置）
+        capacity = max(1, history_capacity or self.HISTORY_INITIAL_CAPACITY)
+        self._hist: np.ndarray = np.empty((capacity, 2), dtype=self.HISTORY_DTYPE)
+        self._hist_len = 0
     
     def add_position(self, position: Tuple[int, int]) -> None:
-        """パス履歴に位置を追加"""
-        self.path_history.append(position)
+        """パス履歴に位置を追加（容量不足時は倍に拡張、償却O(1)）"""
+        n = self._hist_len
+        if n == len(self._hist):
+            grown = np.empty((2 * n, 2), dtype=self.HISTORY_DTYPE)
+            grown[:n] = self._hist
+            self._hist = grown
+        self._hist[n] = position
+        self._hist_len = n + 1
+
+    @property
+    def path_history(self) -> np.ndarray:
+        """
+        パス履歴（形状: (N, 2)、各行が (行, 列)、読み取り専用ビュー）
+        """
+        view = self._hist[:self._hist_len]
+        view.flags.writeable = False
+        return view
     
     def record_step(self) -> None:
         """ステップ数を増加"""
@@ -112,7 +144,7 @@ class RobotStatistics:
             speed: ロボット速度
             batch_orders: バッチ内の注文リスト
         """
-        end_time = time.time()
+        end_time = time.monotonic()
         
         # 本バッチの時間を計算
         batch_time = 0
@@ -123,7 +155,7 @@ class RobotStatistics:
             batch_time = end_time - start_time
         
         # 総配達路程を計算
-        path_length = len(self.path_history) - 1  # 初期位置を除く
+        path_length = self._hist_len - 1  # 初期位置を除く
         
         # 経路長と速度を使用して時間を計算
         calculated_time = path_length / speed
@@ -180,9 +212,8 @@ class RobotStatistics:
         }
         self._delivery_history.append(batch_record)
         
-        logger.info(f"配送サイクル完了、総配送時間: {batch_time:.2f}秒、" 
-                   f"配送注文: {len(batch_orders)}個、"
-                   f"経路長: {path_length}")
+        logger.info("配送サイクル完了、総配送時間: %.2f秒、配送注文: %d個、経路長: %s",
+                   batch_time, len(batch_orders), path_length)
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -194,7 +225,7 @@ class RobotStatistics:
         stats = dict(self._stats)
         
         # 経路情報を追加
-        stats["総配送路程"] = len(self.path_history) - 1  # 初期位置を除く
+        stats["総配送路程"] = self._hist_len - 1  # 初期位置を除く
         
         # ロボットタイプ情報を追加
         stats["ロボットタイプ"] = self.robot_type
@@ -239,10 +270,12 @@ class Robot(IRobot):
         self.parking_spot = layout.parking or (layout.kitchen[0] if layout.kitchen else (0, 0))
         self.position = self.parking_spot
         self.goal: Optional[Tuple[int, int]] = None
-        self.path: List[Tuple[int, int]] = []
+        # 残り経路（先頭が現在位置）。MotionController.step が毎ステップ先頭を取り出す
+        self.path: Deque[Tuple[int, int]] = deque()
 
         # 経路計画器の初期化（依存性の注入）
-        self.planner = planner or PathPlanner(layout)
+        # 未指定時は同じレイアウトのロボット間で共有の計画器を使う（経路キャッシュも共有）
+        self.planner = planner or PathPlanner.for_layout(layout)
         self.controller = MotionController(layout, self.planner)
 
         # 注文キュー
@@ -285,7 +318,7 @@ class Robot(IRobot):
         logger.info("ロボット #%s が注文 #%s をキューに追加", self.robot_id, order.order_id)
         
         # 最後に注文を受けた時間を記録
-        self.last_order_time = time.time()
+        self.last_order_time = time.monotonic()
         
         # ロボットがアイドル状態でバッチ処理中でない場合、バッチ処理タイマーを開始
         if not self.current_order and not self.returning_to_parking and not self.batch_processing:
@@ -309,7 +342,7 @@ class Robot(IRobot):
         
         # 現在のバッチ開始を記録
         if not self.current_batch_start_time:
-            self.current_batch_start_time = time.time()
+            self.current_batch_start_time = time.monotonic()
             self.current_batch_id += 1
             self.current_batch_orders = []
 
@@ -336,36 +369,33 @@ class Robot(IRobot):
         self.goal = delivery_pos
         
         # 経路計画
-        self.path = self.planner.find_path(self.position, self.goal) or []
+        self.path = deque(self.planner.find_path(self.position, self.goal) or ())
         if not self.path:
             logger.error("テーブル %s への経路を計画できません", order.table_id)
             self._finish_delivery(success=False)
             return False
 
-        # インテリジェントロボットの場合、RAGの計画層をトリガーして提案を記録
-        if self.is_ai_enhanced and getattr(self, 'rag', None):
-            rag_result = self.rag.trigger_layer(
-                'plan',
-                {'robot_id': self.robot_id, 'start': self.position, 'goal': self.goal}
-            )
-            logger.info(
-                f"RAG 計画提案: action={rag_result['action']}, "
-                f"context_docs={rag_result['context_docs']}, "
-                f"raw_response={rag_result['raw_response']}"
-            )
+        # 経路確定後のフック（基本ロボットでは何もしない）
+        self._on_path_planned()
 
         # 配達開始
         order.start_delivery()
         
         # 初めて駐車スポットから出発する場合、開始時間を記録
         if self.position == self.parking_spot and self.delivery_start_time is None:
-            self.delivery_start_time = time.time()
+            self.delivery_start_time = time.monotonic()
         
         logger.info("ロボット #%s がテーブル番号 %s への配達を開始、目標位置 %s",
                    self.robot_id, order.table_id, self.goal)
         
         return True
 
+    def _on_path_planned(self) -> None:
+        """
+        配達経路が確定したときに呼ばれるフック
+        基本ロボットでは何もしない（RAG の有無はサブクラスの選択で一度だけ決まる）
+        """
+
     def _optimize_order_queue(self) -> None:
         """
         注文キューの配達順序を最適化
@@ -378,31 +408,60 @@ class Robot(IRobot):
         
         # 現在位置とすべての注文の配達ポイントを取得
         current_pos = self.position
-        delivery_points = {}
+        # 配達ポイントを持つ注文と、その配達ポイント（同じ並び、一度だけ取得）
+        targets: List[Order] = []
+        delivery_points: List[Tuple[int, int]] = []
         
         for order in self.order_queue:
             delivery_pos = self.layout.get_delivery_point(order.table_id)
             if delivery_pos:
-                delivery_points[order.order_id] = delivery_pos
+                targets.append(order)
+                delivery_points.append(delivery_pos)
         
         if not delivery_points:
             return  # 有効な配達ポイントがない
             
         # 距離行列を構築（現在位置から各配達ポイント、および配達ポイント間の距離を含む）
-        points = [current_pos] + list(delivery_points.values())
+        points = [current_pos] + delivery_points
         n = len(points)
         
-        # 経路長計算関数、単純なマンハッタン距離ではなくA*アルゴリズムで実際の経路長を取得
-        def get_path_length(start, end):
+        # 経路長計算関数、単純なマンハッタン距離ではなく実際の経路長を取得
+        # 目標に通行可能な隣接セルがあれば、起点ごとの距離場（BFS一回）から全目標分をまとめて求める
+        layout = self.layout
+        distance_field = getattr(self.planner, "distance_field", None)
+        fields: List[Optional[List[int]]] = [None] * n
+
+        def get_path_length(i, j):
+            start, end = points[i], points[j]
+            if (
+                distance_field is not None
+                and start != end
+                and 0 <= end[0] < layout.height
+                and 0 <= end[1] < layout.width
+                and layout.neighbors(end)
+            ):
+                if fields[i] is None:
+                    fields[i] = distance_field(start)
+                steps = fields[i][end[0] * layout.width + end[1]]
+                return steps + 1 if steps >= 0 else float('inf')
+            # 囲まれた目標などは A*（扩圈を含む）で求める
             path = self.planner.find_path(start, end)
             return len(path) if path else float('inf')
         
         # 距離行列の構築
+        # 通行可能で隣接セルを持つ点同士は往復の最短経路長が等しいため、片方向だけ計算して使い回す
+        symmetric = [
+            self.layout.is_free(p) and bool(self.layout.neighbors(p)) for p in points
+        ]
         distances = [[0 for _ in range(n)] for _ in range(n)]
         for i in range(n):
             for j in range(n):
-                if i != j:
-                    distances[i][j] = get_path_length(points[i], points[j])
+                if i == j:
+                    continue
+                if j < i and symmetric[i] and symmetric[j]:
+                    distances[i][j] = distances[j][i]
+                else:
+                    distances[i][j] = get_path_length(i, j)
         
         # 貪欲法によるTSP近似解：毎回最も近い未訪問点を選択
         # 注意：現在位置（インデックス0）から開始
@@ -412,35 +471,31 @@ class Robot(IRobot):
         
         # 貪欲に経路を構築
         while unvisited:
-            nearest = min(unvisited, key=lambda j: distances[current][j])
+            # 現在点の距離行は一度だけ取り出し、キー関数は組み込みの添字参照にする
+            nearest = min(unvisited, key=distances[current].__getitem__)
             tour.append(nearest)
             unvisited.remove(nearest)
             current = nearest
             
         # 注文キューの再構築
-        new_queue = []
-        
         # 経路を注文に変換（インデックス0はスキップ、それはロボットの現在位置）
-        for idx in tour[1:]:
-            point = points[idx]
-            # この配達ポイントに対応する注文を探す
-            for order in self.order_queue:
-                if delivery_points.get(order.order_id) == point:
-                    new_queue.append(order)
-                    break
+        # points[i] は targets[i - 1] の配達ポイントなので、キューを再走査せず直接引く
+        new_queue = [targets[idx - 1] for idx in tour[1:]]
         
         # 注文キューを更新
         self.order_queue.clear()
         for order in new_queue:
             self.order_queue.append(order)
             
-        # 推定の総配達路程を計算
-        total_distance = sum(distances[tour[i]][tour[i+1]] for i in range(len(tour)-1))
-        
-        logger.info("Robot #%s 注文キューを最適化、実行順序: %s（推定総長: %d）", 
-                   self.robot_id, 
-                   ", ".join([f"#{order.order_id}({order.table_id})" for order in new_queue]),
-                   total_distance)
+        # 実行順序の文字列と推定総長はログ出力時のみ組み立てる
+        if logger.isEnabledFor(logging.INFO):
+            # 推定の総配達路程を計算
+            total_distance = sum(distances[tour[i]][tour[i+1]] for i in range(len(tour)-1))
+            
+            logger.info("Robot #%s 注文キューを最適化、実行順序: %s（推定総長: %d）", 
+                       self.robot_id, 
+                       ", ".join([f"#{order.order_id}({order.table_id})" for order in new_queue]),
+                       total_distance)
 
     def _return_to_parking(self) -> bool:
         """
@@ -448,7 +503,7 @@ class Robot(IRobot):
         """
         self.returning_to_parking = True
         self.goal = self.parking_spot
-        self.path = self.planner.find_path(self.position, self.goal) or []
+        self.path = deque(self.planner.find_path(self.position, self.goal) or ())
         
         if not self.path:
             logger.error("駐車スポットに戻る経路を計画できません")
@@ -462,14 +517,19 @@ class Robot(IRobot):
         """
         ロボットが目標点に到達したかどうかを判断（許容範囲を考慮）
         """
-        if not self.goal:
+        goal = self.goal
+        if not goal:
             return False
+        tolerance = self.GOAL_TOLERANCE
+        if not tolerance:
+            # 許容半径0は座標の一致と同じ（距離計算を省く）
+            return self.position == goal
             
         # 現在位置から目標点までのマンハッタン距離を計算
-        dist = abs(self.position[0] - self.goal[0]) + abs(self.position[1] - self.goal[1])
+        (px, py), (gx, gy) = self.position, goal
         
         # 距離が許容範囲内にある場合、目標に到達したと見なす
-        return dist <= self.GOAL_TOLERANCE
+        return abs(px - gx) + abs(py - gy) <= tolerance
 
     # ---------------- シミュレーションループ ---------------- #
     def tick(self) -> None:
@@ -478,7 +538,7 @@ class Robot(IRobot):
         
         # バッチ処理タイマーをチェック
         if self.batch_processing and self.last_order_time:
-            if time.time() - self.last_order_time >= self.batch_collection_time:
+            if time.monotonic() - self.last_order_time >= self.batch_collection_time:
                 # バッチ処理時間ウィンドウが終了、注文を処理
                 logger.info("Robot #%s バッチ処理時間ウィンドウが終了、注文キューを最適化", self.robot_id)
                 self.batch_processing = False
@@ -514,7 +574,47 @@ class Robot(IRobot):
         # 目標点に到着したかどうかをチェック（許容範囲を考慮）
         if self.goal and self._is_at_goal():
             # 目標に到着、残り経路をクリア
-            self.path = []
+            self.path.clear()
+
+    def _advance(self, budget: int) -> int:
+        """
+        シミュレーションを進める：通行可能な区間は一括で辿り、
+        障害・障害前の待機・到着処理・バッチ待ちのときだけ tick を1回実行
+
+        Returns:
+            int: 消費したステップ数
+        """
+        if self.path and not self.batch_processing and not self.controller.is_waiting:
+            steps = self._replay_path(budget)
+            if steps:
+                return steps
+        self.tick()
+        return 1
+
+    def _replay_path(self, budget: int) -> int:
+        """
+        計画済みの残り経路を障害に当たるまでまとめて辿る
+        （1歩ごとの tick / MotionController.step 呼び出しを省く。統計は tick と同じく記録）
+
+        Returns:
+            int: 進んだステップ数
+        """
+        path = self.path
+        is_free = self.layout.is_free
+        steps = 0
+        while len(path) > 1 and steps < budget:
+            next_pos = path[1]
+            if not is_free(next_pos):
+                break
+            path.popleft()
+            self.position = next_pos
+            self._stats.record_step()
+            self._stats.add_position(next_pos)
+            steps += 1
+            if self.goal and self._is_at_goal():
+                # 目標に到着、残り経路をクリア
+                path.clear()
+        return steps
 
     def _finish_delivery(self, *, success: bool) -> None:
         if not self.current_order:
@@ -532,7 +632,7 @@ class Robot(IRobot):
             logger.error("注文 #%s 配送失敗", self.current_order.order_id)
         self.current_order = None
         self.goal = None
-        self.path = []
+        self.path.clear()
 
     def _calculate_delivery_cycle_time(self) -> None:
         """
@@ -558,7 +658,7 @@ class Robot(IRobot):
         step = 0
         # 配送開始時間（まだ設定されていない場合）を記録
         if self.delivery_start_time is None:
-            self.delivery_start_time = time.time()
+            self.delivery_start_time = time.monotonic()
             
         # バッチ処理モードの場合、先にバッチ処理ウィンドウを閉じるのを待つ
         if self.batch_processing:
@@ -568,15 +668,13 @@ class Robot(IRobot):
                 self._process_next_order()
         
         while (self.path or self.current_order or self.order_queue or self.returning_to_parking) and step < max_step:
-            self.tick()
-            step += 1
+            step += self._advance(max_step - step)
         
         # バッチ処理モードが終了しても駐車スポットに戻れない場合、駐車スポットに戻る
         if self.position != self.parking_spot and not self.returning_to_parking:
             self._return_to_parking()
             while self.path and step < max_step:
-                self.tick()
-                step += 1
+                step += self._advance(max_step - step)
         
         # シミュレーション終了時に駐車スポットに戻れない場合、配送サイクルを記録
         if not self.returning_to_parking and self.delivery_start_time is not None:
@@ -591,9 +689,9 @@ class Robot(IRobot):
         return self._stats.get_stats()
     
     @property
-    def path_history(self) -> list[tuple[int, int]]:
+    def path_history(self) -> np.ndarray:
         """
-        パス履歴を取得
+        パス履歴を取得（形状: (N, 2) の読み取り専用配列）
         """
         return self._stats.path_history
 
@@ -615,11 +713,58 @@ class AIEnhancedRobot(Robot):
         # 基底クラスの初期化
         super().__init__(layout, robot_id, start=start, planner=planner)
         
-        # RAGモジュールの初期化
-        self.rag = RAGModule(
-            api_key=api_key,
-            knowledge_file=os.path.join(knowledge_dir, "restaurant_rule.json") if knowledge_dir else None,
-        )
+        # RAGモジュール（同じ設定のロボット間で共有し、知識ベースの読み込みは一度だけ）
+        self.rag = RAGModule.shared(api_key=api_key, knowledge_dir=knowledge_dir)
         
         # RAG対応のコントローラーに置き換え
         self.controller = MotionController(layout, self.planner, rag=self.rag)
+
+    def _on_path_planned(self) -> None:
+        """
+        RAGの計画層をトリガーして提案を記録
+        """
+        rag_result = self.rag.trigger_layer(
+            'plan',
+            {'robot_id': self.robot_id, 'start': self.position, 'goal': self.goal}
+        )
+        logger.info(
+            "RAG 計画提案: action=%s, context_docs=%s, raw_response=%s",
+            rag_result['action'],
+            rag_result['context_docs'],
+            rag_result['raw_response'],
+        )
+
+
+# ---------------- 複数ロボットの並列シミュレーション ---------------- #
+def _simulate_one(args: Tuple[Robot, int]) -> Robot:
+    robot, max_step = args
+    robot.simulate(max_step)
+    return robot
+
+
+def simulate_fleet(
+    robots: Iterable[Robot],
+    max_step: int = 500,
+    max_workers: Optional[int] = None,
+) -> List[Robot]:
+    """
+    互いに独立したロボットの simulate() をプロセスプールで並列実行する
+
+    ロボットの台数によらず、常に複製をシミュレーションして返す（入力のロボットは変更しない）
+    シミュレーション後のロボット（入力と同じ順序）は戻り値から受け取ること
+    RAGモジュール（APIクライアント）を持つ AIEnhancedRobot は複製できないため対象外
+
+    Args:
+        robots: シミュレーションするロボット
+        max_step: ロボットごとの最大ステップ数
+        max_workers: ワーカープロセス数（省略時はCPU数）
+
+    Returns:
+        List[Robot]: シミュレーション後のロボット（入力の複製）
+    """
+    robots = list(robots)
+    if len(robots) <= 1:
+        # 1台ならプロセスは起動せず、複製をその場で実行（入力を変更しない点は並列時と同じ）
+        return [_simulate_one((copy.deepcopy(robot), max_step)) for robot in robots]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_simulate_one, [(robot, max_step) for robot in robots]))